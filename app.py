@@ -1,15 +1,19 @@
+import hmac
 import os
+import socket
 import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait
 from time import time
 
-import requests
-from flask import Flask, request, abort, jsonify, render_template
+import pytz
+from flask import Flask, Response, request, abort, jsonify, render_template
 from flask_bootstrap import Bootstrap
 from linebot import (
     LineBotApi, WebhookHandler
 )
 from linebot.exceptions import (
-    LineBotApiError, InvalidSignatureError
+    LineBotApiError
 )
 from linebot.models import (
     SourceUser, SourceGroup, SourceRoom,
@@ -18,18 +22,57 @@ from linebot.models import (
     FollowEvent, FlexSendMessage, BubbleContainer, CarouselContainer
 )
 
-from football_api import FootballApi
+import http_client
+from cache import ResponseCache
+from chat_store import ChatStore
+from disk_cache import DiskCache
+from fanout import FanOut
+from feed_poller import FeedPoller
+from football_api import FootballApi, league_competitions
 from football_news import FootballNews
-from rss_feed import RssFeed
+import images
+import metrics
+from line_directory import LiffDirectory, RichMenuDirectory
+import live_scores
+from match_time import ChatTimeZones
+from render_cache import RenderCache
+from rss_feed import DEFAULT_NEWS_IMAGE_URL, FEED_SOURCES, RssFeed
+from subscriptions import LIVE_TV_TOPIC, SubscriptionRegistry, league_topic
+from webhook_queue import WebhookQueue
 
 app = Flask(__name__)
 bootstrap = Bootstrap(app)
+cache_db_path = os.getenv('CACHE_DB_PATH')
+disk_cache = DiskCache(cache_db_path) if cache_db_path else None
+if disk_cache is not None:
+    disk_cache.start_compaction()
+# subscriptions and other per-chat settings outlive restarts and are shared by every worker
+chat_store = ChatStore()
 rss_feed = RssFeed()
 football_news = FootballNews()
-football_api = FootballApi()
+football_api = FootballApi(cache=ResponseCache(backend=disk_cache), store=chat_store)
+render_cache = RenderCache()
+handler_seconds = metrics.registry.histogram('handler_seconds', 'Time spent in each request and event handler.',
+                                             ('handler',))
+handler_errors = metrics.registry.counter('handler_errors_total', 'Exceptions raised by each handler.', ('handler',))
+instrumented = metrics.instrument(handler_seconds, handler_errors)
+feed_seconds = metrics.registry.histogram('feed_fetch_seconds', 'Time to download and parse each news source.',
+                                          ('source',))
+feed_errors = metrics.registry.counter('feed_fetch_errors_total', 'Failed downloads of each news source.', ('source',))
+news_deadline_skips = metrics.registry.counter('news_deadline_skips_total',
+                                               'News sources left out of news=all by the deadline.', ('source',))
+# news images are validated once and, with IMAGE_PROXY_URL set, served as small thumbnails from /img/<hash>
+image_store = None
+if images.IMAGE_PROXY_URL:
+    image_store = DiskCache(images.IMAGE_CACHE_PATH, max_bytes=images.IMAGE_CACHE_MAX_BYTES)
+    image_store.start_compaction()
+news_images = images.ImageProxy(DEFAULT_NEWS_IMAGE_URL, images.IMAGE_PROXY_URL, image_store)
+chat_time_zones = ChatTimeZones(store=chat_store)
 
 channel_secret = os.getenv('LINE_CHANNEL_SECRET', None)
 channel_access_token = os.getenv('LINE_CHANNEL_ACCESS_TOKEN', None)
+# shared with the scheduler that triggers the TV schedule broadcast; unset disables the broadcast
+live_broadcast_token = os.getenv('LIVE_BROADCAST_TOKEN')
 if channel_secret is None:
     print('Specify LINE_CHANNEL_SECRET as environment variable.')
     sys.exit(1)
@@ -37,8 +80,13 @@ if channel_access_token is None:
     print('Specify LINE_CHANNEL_ACCESS_TOKEN as environment variable.')
     sys.exit(1)
 
-line_bot_api = LineBotApi(channel_access_token)
+line_bot_api = LineBotApi(channel_access_token, http_client=http_client.PooledLineHttpClient)
 handler = WebhookHandler(channel_secret)
+rich_menu_directory = RichMenuDirectory(line_bot_api)
+# without the warm-up thread each directory loads on its first lookup
+directory_warmup = os.getenv('DIRECTORY_WARMUP', 'on') != 'off'
+if directory_warmup:
+    rich_menu_directory.start()
 
 MAIN_MENU_CHAT_BAR = 'MainMenu'
 RESULTS_CHAT_BAR = 'Results'
@@ -47,6 +95,12 @@ TEAM_NEWS_CHAT_BAR = 'Team News'
 TEAM_CHAT_BAR = 'Team'
 STANDINGS_CHAT_BAR = 'Standings'
 
+# LIFF views served by this app, resolved to line://app/<id> links
+LIFF_ENDPOINTS = ['/liff']
+liff_directory = LiffDirectory(channel_access_token, LIFF_ENDPOINTS)
+if directory_warmup:
+    liff_directory.start()
+
 fixtures_header_color = {
     'pl': '#3D185B',
     'ucl': '#231F20',
@@ -55,6 +109,58 @@ fixtures_header_color = {
     'calcio': '#098D37'
 }
 
+# name: (fetch, poll interval in seconds)
+news_feeds = {
+    'bbc': (rss_feed.get_bbc_feed, 120),
+    'skysports': (rss_feed.get_skysports_feed, 120),
+    'guardian': (rss_feed.get_guardian_feed, 120),
+    'mirror': (rss_feed.get_mirror_feed, 120),
+    'goal': (rss_feed.get_goal_feed, 300),
+    'shotongoal': (rss_feed.get_shot_on_goal_feed, 300),
+    'dailymail': (rss_feed.get_daily_mail_feed, 120),
+    'soccersuck': (rss_feed.get_soccersuck_feed, 300),
+    'manutd': (rss_feed.get_manutd_feed, 600),
+    'arsenal': (rss_feed.get_arsenal_feed, 600),
+    'liverpool': (rss_feed.get_liverpool_feed, 600),
+    'chelsea': (rss_feed.get_chelsea_feed, 600),
+    'mancity': (rss_feed.get_mancity_feed, 600)
+}
+
+
+def _news_fetch(name, fetch):
+    # images are checked and thumbnailed when a feed is fetched, not while a reply is built
+    def fetch_news(limit):
+        try:
+            with feed_seconds.time(name):
+                data = fetch(limit)
+        except Exception:
+            feed_errors.inc(name)
+            raise
+        return news_images.prepare_entries(data)
+    return fetch_news
+
+
+feed_poller = FeedPoller(store=disk_cache)
+for feed_name, (fetch, interval) in list(news_feeds.items()):
+    news_feeds[feed_name] = (_news_fetch(feed_name, fetch), interval)
+    feed_poller.add_source(feed_name, news_feeds[feed_name][0], interval,
+                           oldest_first=FEED_SOURCES.get(feed_name, {}).get('sort') == 'asc')
+if os.getenv('FEED_POLLER', 'on') != 'off':
+    feed_poller.start()
+
+# (name, header background, header text color) in carousel order
+all_news_sources = [
+    ('bbc', '#FEE63E', '#000000'),
+    ('skysports', '#BB0211', '#ffffff'),
+    ('guardian', '#09508D', '#ffffff'),
+    ('mirror', '#E80E0D', '#ffffff'),
+    ('goal', '#091F2C', '#ffffff'),
+    ('shotongoal', '#1A1A1A', '#ffffff'),
+    ('soccersuck', '#197F4D', '#ffffff')
+]
+ALL_NEWS_DEADLINE = float(os.getenv('ALL_NEWS_DEADLINE', '5'))
+news_executor = ThreadPoolExecutor(max_workers=len(all_news_sources) * 2)
+
 team_name_dict = {
     'manutd': '66',
     'arsenal': '57',
@@ -63,17 +169,37 @@ team_name_dict = {
     'mancity': '65'
 }
 
+subscriptions = SubscriptionRegistry(store=chat_store)
+fanout = FanOut(channel_access_token)
+competition_leagues = dict((competition_id, league_name) for league_name, competition_id in league_competitions.items())
+live_alert_formats = {
+    live_scores.GOAL: '⚽ GOAL! {home} {home_goals} - {away_goals} {away}',
+    live_scores.HALF_TIME: 'HT: {home} {home_goals} - {away_goals} {away}',
+    live_scores.FULL_TIME: 'FT: {home} {home_goals} - {away_goals} {away}'
+}
 
-@app.route("/callback", methods=['POST'])
-def callback():
-    # get X-Line-Signature header value
-    signature = request.headers['X-Line-Signature']
 
-    # get request body as text
-    body = request.get_data(as_text=True)
-    app.logger.info("Request body: " + body)
+def push_live_alert(event, competition_id, match):
+    full_time = match['score']['fullTime']
+    text = live_alert_formats[event].format(home=match['homeTeam']['name'], away=match['awayTeam']['name'],
+                                            home_goals=full_time['homeTeam'] or 0,
+                                            away_goals=full_time['awayTeam'] or 0)
+    fanout.send(subscriptions.subscribers(league_topic(competition_leagues[competition_id])),
+                TextSendMessage(text=text))
+
+
+# every gunicorn worker starts an engine, the one holding the lease in the chat store polls and alerts
+live_score_owner = '{0}:{1}:{2}'.format(socket.gethostname(), os.getpid(), uuid.uuid4().hex[:8])
+live_score_engine = live_scores.LiveScoreEngine(
+    football_api, league_competitions.values(), push_live_alert,
+    elect=lambda ttl: chat_store.acquire_lease('live_scores', live_score_owner, ttl))
+if os.getenv('LIVE_SCORES', 'on') != 'off':
+    live_score_engine.start()
 
-    # handle webhook body
+
+@instrumented
+def handle_webhook(job):
+    body, signature = job
     try:
         handler.handle(body, signature)
     except LineBotApiError as e:
@@ -81,12 +207,59 @@ def callback():
         for m in e.error.details:
             print("  %s: %s" % (m.property, m.message))
         print("\n")
-    except InvalidSignatureError:
+
+
+webhook_queue = WebhookQueue(handle_webhook,
+                             workers=int(os.getenv('WEBHOOK_WORKERS', '4')),
+                             max_size=int(os.getenv('WEBHOOK_QUEUE_SIZE', '100')),
+                             put_timeout=float(os.getenv('WEBHOOK_QUEUE_TIMEOUT', '1')))
+webhook_queue.start()
+
+# existing stats() snapshots, read only when /metrics is scraped
+metrics.registry.add_stats('webhook_queue', 'Webhook worker queue depth, waits and outcomes.', webhook_queue.stats,
+                           counters=('enqueued', 'processed', 'failed', 'rejected'))
+metrics.registry.add_stats('football_api', 'football-data.org response cache, rate limiter and match index.',
+                           football_api.stats,
+                           counters=('hits', 'misses', 'backend_hits', 'evictions', 'coalesced', 'queued', 'throttled',
+                                     'match_store_loads', 'match_store_refreshes'))
+metrics.registry.add_stats('match_time', 'Formatted kickoff time cache.', football_api.time_formatter.stats,
+                           counters=('hits', 'misses'))
+metrics.registry.add_stats('render_cache', 'Flex message render cache.', render_cache.stats,
+                           counters=('hits', 'misses'))
+metrics.registry.add_stats('rss_feed', 'Conditional feed downloads answered 304 Not Modified.', rss_feed.feed_stats,
+                           counters=('polls', 'not_modified'))
+metrics.registry.add_stats('news_images', 'News image checks and thumbnails.', news_images.stats,
+                           counters=('hits', 'misses', 'invalid', 'rendered', 'served'))
+metrics.registry.add_stats('fanout', 'Broadcast deliveries, retries and throughput.', fanout.stats,
+                           counters=('broadcasts', 'delivered', 'failed', 'requests', 'retries'))
+metrics.registry.add_stats('live_scores', 'Live score polls, football-data requests and alerts.',
+                           live_score_engine.stats, counters=('polls', 'calls', 'alerts'))
+
+
+@app.route("/callback", methods=['POST'])
+def callback():
+    # get X-Line-Signature header value
+    signature = request.headers['X-Line-Signature']
+
+    # get request body as text
+    body = request.get_data(as_text=True)
+    app.logger.info("Request body: " + body)
+
+    # verify now, reply from a worker so the webhook request returns immediately
+    if not handler.parser.signature_validator.validate(body, signature):
         abort(400)
+    if not webhook_queue.submit((body, signature)):
+        print('webhook queue full, rejecting request: {0}'.format(webhook_queue.stats()))
+        abort(503)
 
     return 'OK'
 
 
+@app.route('/metrics')
+def handle_metrics():
+    return Response(metrics.registry.expose(), content_type=metrics.CONTENT_TYPE)
+
+
 @app.route('/')
 def hello_world():
     return 'Hello World!'
@@ -95,16 +268,44 @@ def hello_world():
 def handle_liff():
     return render_template('index.html')
 
-@app.route('/live', methods=['GET'])
+@app.route('/img/<digest>')
+@instrumented
+def handle_image(digest):
+    content = news_images.get(digest)
+    if content is None:
+        abort(404)
+    return Response(content, mimetype='image/jpeg', headers={'Cache-Control': 'public, max-age=86400'})
+
+
+@app.route('/live', methods=['GET', 'POST'])
+@instrumented
 def handle_live():
-    to = request.args.get('id')
+    # GET ?id=<chat id> sends to one chat; POST sends to every chat subscribed to the TV schedule
+    # and is only accepted from the scheduler, which holds LIVE_BROADCAST_TOKEN
+    if request.method == 'POST':
+        authorization = request.headers.get('Authorization', '').encode('utf-8')
+        if not live_broadcast_token or \
+                not hmac.compare_digest(authorization, ('Bearer ' + live_broadcast_token).encode('utf-8')):
+            abort(403)
+        chat_ids = subscriptions.subscribers(LIVE_TV_TOPIC)
+    else:
+        to = request.args.get('id')
+        if not to:
+            abort(400)
+        chat_ids = [to]
+    result = {'status': 'ok', 'chats': len(chat_ids)}
     data = rss_feed.get_live_feed()
     if len(data) > 0:
         carousel_data = rss_feed.create_live_flxed(data['data'])
         if carousel_data is not None:
             carousel_message = CarouselContainer.new_from_json_dict(carousel_data)
-            line_bot_api.push_message(to=to, messages=FlexSendMessage(alt_text="โปรแกรมถ่ายทอดสดฟุตบอล", contents=carousel_message))
-    return jsonify({'status': 'ok'})
+            result.update(fanout.send(chat_ids, FlexSendMessage(alt_text="โปรแกรมถ่ายทอดสดฟุตบอล", contents=carousel_message)))
+    return jsonify(result)
+
+
+def _chat_zone(event):
+    # kickoff times are shown in the zone chosen for this user, group or room
+    return chat_time_zones.get(event.source.sender_id)
 
 
 def print_source(event):
@@ -118,109 +319,105 @@ def print_source(event):
 
 @app.route('/news/bbc/<limit>')
 def get_bbc_news(limit):
-    data = rss_feed.get_bbc_feed(int(limit))
+    data = get_news('bbc', int(limit))
     return jsonify(data)
 
 
 @app.route('/news/skysports/<limit>')
 def get_skysports_news(limit):
-    data = rss_feed.get_skysports_feed(int(limit))
+    data = get_news('skysports', int(limit))
     return jsonify(data)
 
 
 @app.route('/news/goal/<limit>')
 def get_goal_news(limit):
-    data = rss_feed.get_goal_feed(int(limit))
+    data = get_news('goal', int(limit))
     return jsonify(data)
 
 
 @app.route('/news/guardian/<limit>')
 def get_guardian_news(limit):
-    data = rss_feed.get_guardian_feed(int(limit))
+    data = get_news('guardian', int(limit))
     return jsonify(data)
 
 
 @app.route('/news/mirror/<limit>')
 def get_mirror_news(limit):
-    data = rss_feed.get_mirror_feed(int(limit))
+    data = get_news('mirror', int(limit))
     return jsonify(data)
 
 
 @app.route('/news/shotongoal/<limit>')
 def get_shotongoal_news(limit):
-    data = rss_feed.get_shot_on_goal_feed(int(limit))
+    data = get_news('shotongoal', int(limit))
     return jsonify(data)
 
 
 @app.route('/news/soccersuck/<limit>')
 def get_soccersuck_news(limit):
-    data = rss_feed.get_soccersuck_feed(int(limit))
+    data = get_news('soccersuck', int(limit))
     return jsonify(data)
 
 
 @app.route('/news/dailymail/<limit>')
 def get_dailymail_news(limit):
-    data = rss_feed.get_daily_mail_feed(int(limit))
+    data = get_news('dailymail', int(limit))
     return jsonify(data)
 
 
+def get_news(name, limit):
+    data = feed_poller.get(name, limit)
+    if data is None:
+        fetch, interval = news_feeds[name]
+        data = fetch(limit)
+    return data
+
+
+@instrumented
 def get_all_news(reply_token):
     print('handle_postback: news=all')
+    futures = [news_executor.submit(get_news, name, 5) for name, bg_color, text_color in all_news_sources]
+    wait(futures, timeout=ALL_NEWS_DEADLINE)
     carousel_template = CarouselContainer()
-    # bbc-sport
-    bbc_data = rss_feed.get_bbc_feed(5)
-    carousel_template.contents.append(football_news.get_news_bubble("#FEE63E", bbc_data, header_text_color="#000000"))
-    print('news=all, bbc-sport completed')
-    # sky-sport
-    sky_data = rss_feed.get_skysports_feed(5)
-    carousel_template.contents.append(football_news.get_news_bubble("#BB0211", sky_data))
-    print('news=all, sky-sports completed')
-    # guardian
-    guardian_data = rss_feed.get_guardian_feed(5)
-    carousel_template.contents.append(
-        football_news.get_news_bubble("#09508D", guardian_data))
-    print('news=all, guardian completed')
-    # mirror
-    mirror_data = rss_feed.get_mirror_feed(5)
-    carousel_template.contents.append(
-        football_news.get_news_bubble("#E80E0D", mirror_data))
-    print('news=all, mirror completed')
-    # goal-com
-    goal_data = rss_feed.get_goal_feed(5)
-    carousel_template.contents.append(
-        football_news.get_news_bubble("#091F2C", goal_data))
-    print('news=all, goal-com completed')
-    # shotongoal
-    shotongoal_data = rss_feed.get_shot_on_goal_feed(5)
-    carousel_template.contents.append(
-        football_news.get_news_bubble("#1A1A1A", shotongoal_data))
-    print('news=all, shotongoal completed')
-    # soccersuck
-    soccersuck_data = rss_feed.get_soccersuck_feed(5)
-    carousel_template.contents.append(
-        football_news.get_news_bubble("#197F4D", soccersuck_data))
-    print('news=all, soccersuck completed')
+    for (name, bg_color, text_color), future in zip(all_news_sources, futures):
+        if not future.done():
+            future.cancel()
+            news_deadline_skips.inc(name)
+            print('news=all, {0} skipped: no response within {1}s'.format(name, ALL_NEWS_DEADLINE))
+            continue
+        try:
+            data = future.result()
+        except Exception as e:
+            print('news=all, {0} failed: {1!r}'.format(name, e))
+            continue
+        carousel_template.contents.append(football_news.get_news_bubble(bg_color, data, header_text_color=text_color))
+        print('news=all, {0} completed'.format(name))
 
     line_bot_api.reply_message(reply_token, FlexSendMessage(alt_text='AllNews', contents=carousel_template))
 
 
 def _transition_rich_menu(user_id, to):
-    rich_menu_list = line_bot_api.get_rich_menu_list()
+    rich_menu_id = rich_menu_directory.get(to)
+    if rich_menu_id is None:
+        # the menu may have been created since the directory was loaded
+        rich_menu_id = rich_menu_directory.load().get(to)
+    if rich_menu_id is None:
+        # the user keeps the current menu rather than being left without one
+        print('no richmenu with chat bar text: \"{0}\"'.format(to))
+        return
     line_bot_api.unlink_rich_menu_from_user(user_id)
-    for rich_menu in rich_menu_list:
-        if rich_menu.chat_bar_text == to:
-            print('linking richmenu: \"{0}\" to user_id: {1}'.format(rich_menu.chat_bar_text, user_id))
-            line_bot_api.link_rich_menu_to_user(user_id, rich_menu.rich_menu_id)
+    print('linking richmenu: \"{0}\" to user_id: {1}'.format(to, user_id))
+    try:
+        line_bot_api.link_rich_menu_to_user(user_id, rich_menu_id)
+    except LineBotApiError:
+        # the menu was deleted or recreated since the directory was loaded
+        rich_menu_id = rich_menu_directory.load().get(to)
+        if rich_menu_id is None:
+            raise
+        line_bot_api.link_rich_menu_to_user(user_id, rich_menu_id)
 
 
-def handle_fixtures(event):
-    data = event.postback.data
-    league_name = str(data).split('=')[1]
-    fixtures_data = football_api.get_fixtures(league_name)
-    if len(fixtures_data) == 2:
-        line_bot_api.reply_message(event.reply_token, messages=TextSendMessage(text='No Fixtures In MatchDay {0}'.format(fixtures_data['match_day'])))
-        return
-    # carousel template
+def build_fixtures_carousel(league_name, fixtures_data):
     carousel_container = CarouselContainer()
     for date, data in fixtures_data.items():
         bubble = {
@@ -309,20 +506,25 @@ def handle_fixtures(event):
                     }
                 )
             carousel_container.contents.append(bubble)
+    return carousel_container
 
-    line_bot_api.reply_message(event.reply_token, messages=FlexSendMessage(alt_text='Fixtures',
-                                                                           contents=carousel_container))
 
-
-def handle_results(event):
-    print('handle_results')
+@instrumented
+def handle_fixtures(event):
     data = event.postback.data
     league_name = str(data).split('=')[1]
-    fixtures_data = football_api.get_results(league_name, 7)
-    if len(fixtures_data) == 1:
-        line_bot_api.reply_message(event.reply_token, messages=TextSendMessage(text='No Result'))
+    zone = _chat_zone(event)
+    fixtures_data = football_api.get_fixtures(league_name, zone)
+    if len(fixtures_data) == 2:
+        line_bot_api.reply_message(event.reply_token, messages=TextSendMessage(text='No Fixtures In MatchDay {0}'.format(fixtures_data['match_day'])))
         return
-    # carousel template
+    carousel_container = render_cache.get_or_render('fixtures', (league_name, zone), fixtures_data,
+                                                   lambda d: build_fixtures_carousel(league_name, d))
+    line_bot_api.reply_message(event.reply_token, messages=FlexSendMessage(alt_text='Fixtures',
+                                                                           contents=carousel_container))
+
+
+def build_results_carousel(league_name, fixtures_data):
     carousel_container = CarouselContainer()
     for date, data in fixtures_data.items():
         bubble = {
@@ -419,16 +621,26 @@ def handle_results(event):
                     }
                 )
             carousel_container.contents.append(bubble)
+    return carousel_container
 
+
+@instrumented
+def handle_results(event):
+    print('handle_results')
+    data = event.postback.data
+    league_name = str(data).split('=')[1]
+    zone = _chat_zone(event)
+    fixtures_data = football_api.get_results(league_name, 7, zone)
+    if len(fixtures_data) == 1:
+        line_bot_api.reply_message(event.reply_token, messages=TextSendMessage(text='No Result'))
+        return
+    carousel_container = render_cache.get_or_render('results', (league_name, zone), fixtures_data,
+                                                   lambda d: build_results_carousel(league_name, d))
     line_bot_api.reply_message(event.reply_token, messages=FlexSendMessage(alt_text='Results',
                                                                            contents=carousel_container))
 
 
-def handle_teams(event):
-    print('handle_teams')
-    postback_data = event.postback.data
-    team_id = postback_data.split('=')[1]
-    team_data = football_api.get_team(team_id)
+def build_team_carousel(team_data):
     carousel = CarouselContainer()
     pages = [team_data['players'][i: i+10] for i in range(0, len(team_data['players']), 10)]
     for page in pages:
@@ -529,34 +741,45 @@ def handle_teams(event):
                     ]
                 }
             )
-            bubble_container = BubbleContainer.new_from_json_dict(bubble)
+        bubble_container = BubbleContainer.new_from_json_dict(bubble)
         carousel.contents.append(bubble_container)
+    return carousel
+
+
+@instrumented
+def handle_teams(event):
+    print('handle_teams')
+    postback_data = event.postback.data
+    team_id = postback_data.split('=')[1]
+    team_data = football_api.get_team(team_id)
+    carousel = render_cache.get_or_render('team', team_id, team_data, build_team_carousel)
     line_bot_api.reply_message(event.reply_token, FlexSendMessage(alt_text='Team', contents=carousel))
 
 
+@instrumented
 def handle_team_news(event):
     data = event.postback.data
     if data == 'team_news=manutd':
-        manutd_news = rss_feed.get_manutd_feed(5)
+        manutd_news = get_news('manutd', 5)
         manutd_result = football_news.get_news_bubble("#DC1F29", manutd_news)
         line_bot_api.reply_message(event.reply_token, messages=FlexSendMessage(alt_text='Manchester United News', contents=manutd_result))
     if data == 'team_news=arsenal':
-        arsenal_news = rss_feed.get_arsenal_feed(5)
+        arsenal_news = get_news('arsenal', 5)
         arsenal_result = football_news.get_news_bubble("#EC0C1C", arsenal_news)
         line_bot_api.reply_message(event.reply_token,
                                    messages=FlexSendMessage(alt_text='Arsenal News', contents=arsenal_result))
     if data == 'team_news=liverpool':
-        liverpool_news = rss_feed.get_liverpool_feed(5)
+        liverpool_news = get_news('liverpool', 5)
         liverpool_result = football_news.get_news_bubble("#C8102E", liverpool_news)
         line_bot_api.reply_message(event.reply_token,
                                    messages=FlexSendMessage(alt_text='Liverpool News', contents=liverpool_result))
     if data == 'team_news=chelsea':
-        chelsea_news = rss_feed.get_chelsea_feed(5)
+        chelsea_news = get_news('chelsea', 5)
         chelsea_result = football_news.get_news_bubble("#034694", chelsea_news)
         line_bot_api.reply_message(event.reply_token,
                                    messages=FlexSendMessage(alt_text='Chelsea News', contents=chelsea_result))
     if data == 'team_news=mancity':
-        mancity_news = rss_feed.get_mancity_feed(5)
+        mancity_news = get_news('mancity', 5)
         mancity_result = football_news.get_news_bubble("#99C5E7", mancity_news)
         line_bot_api.reply_message(event.reply_token,
                                    messages=FlexSendMessage(alt_text='Manchester City News', contents=mancity_result))
@@ -564,14 +787,7 @@ def handle_team_news(event):
     print('handle_team_news')
 
 
-def handle_standings(event):
-    print('handle_standings')
-    data = event.postback.data
-    league_name = str(data).split('=')[1]
-    standings_data = football_api.get_standings(league_name)
-    if len(standings_data['teams']) == 0:
-        line_bot_api.reply_message(event.reply_token, messages=TextSendMessage(text='No Standings Data'))
-        return
+def build_standings_carousel(league_name, standings_data):
     carousel = CarouselContainer()
     pages = [standings_data['teams'][i: i+10] for i in range(0, len(standings_data['teams']), 10)]
     for page in pages:
@@ -680,15 +896,26 @@ def handle_standings(event):
                     ]
                 }
             )
-            bubble_container = BubbleContainer.new_from_json_dict(bubble)
+        bubble_container = BubbleContainer.new_from_json_dict(bubble)
         carousel.contents.append(bubble_container)
+    return carousel
+
+
+@instrumented
+def handle_standings(event):
+    print('handle_standings')
+    data = event.postback.data
+    league_name = str(data).split('=')[1]
+    standings_data = football_api.get_standings(league_name)
+    if len(standings_data['teams']) == 0:
+        line_bot_api.reply_message(event.reply_token, messages=TextSendMessage(text='No Standings Data'))
+        return
+    carousel = render_cache.get_or_render('standings', league_name, standings_data,
+                                         lambda d: build_standings_carousel(league_name, d))
     line_bot_api.reply_message(event.reply_token, FlexSendMessage(alt_text='Standings', contents=carousel))
 
 
-def handle_matches_by_team(event):
-    print('handle_matches_by_team')
-    team_id = event.postback.data.split('=')[1]
-    team_fixtures = football_api.get_matches_by_team(team_id, 5)
+def build_team_fixtures_bubble(team_id, team_fixtures):
     bubble = {
         "type": "bubble",
         "styles": {
@@ -770,9 +997,21 @@ def handle_matches_by_team(event):
             }
         )
     bubble_container = BubbleContainer.new_from_json_dict(bubble)
+    return bubble_container
+
+
+@instrumented
+def handle_matches_by_team(event):
+    print('handle_matches_by_team')
+    team_id = event.postback.data.split('=')[1]
+    zone = _chat_zone(event)
+    team_fixtures = football_api.get_matches_by_team(team_id, 5, zone)
+    bubble_container = render_cache.get_or_render('matches_by_team', (team_id, zone), team_fixtures,
+                                                 lambda d: build_team_fixtures_bubble(team_id, d))
     line_bot_api.reply_message(event.reply_token, messages=FlexSendMessage(alt_text='Team Fixtures', contents=bubble_container))
     
 @handler.add(PostbackEvent)
+@instrumented
 def handle_postback(event):
     data = event.postback.data
     print('postback.data: {}'.format(data))
@@ -812,33 +1051,27 @@ def print_help(event):
     @bot teamnews=<team_name>
     @bot team=<team_name>
     @bot standings=<league_name>
+    @bot timezone=<time_zone>
+    @bot subscribe=<topic>
+    @bot unsubscribe=<topic>
 
     <league_name> = pl | ucl | bundesliga | laliga | calcio
     <team_name> = manutd | arsenal | liverpool | chelsea | mancity
+    <topic> = tv (daily live TV schedule) | <league_name> (live score alerts)
+    <time_zone> = Asia/Bangkok | Europe/London | ... (IANA time zone name)
     """
     line_bot_api.reply_message(event.reply_token, messages=TextSendMessage(text=help))
 
-def get_liff_app(endpoint):
-    url = 'https://api.line.me/liff/v1/apps'
-    headers = {
-        'Authorization': 'Bearer {}'.format(channel_access_token) 
-    }
-    response = requests.get(url, headers=headers)
-    resp_json = response.json()
-    for app in resp_json['apps']:
-        if endpoint in app['view']['url']:
-            return 'line://app/{}'.format(app['liffId'])
-    return ''
-
 
 @handler.add(MessageEvent, message=TextMessage)
+@instrumented
 def handle_text_message(event):
     text = event.message.text
     print_source(event)
     result = ''
 
     if text.lower() == 'liff':
-        line_bot_api.reply_message(event.reply_token, messages=TextSendMessage(text=get_liff_app('/liff')))
+        line_bot_api.reply_message(event.reply_token, messages=TextSendMessage(text=liff_directory.get('/liff')))
         return
     if 'live' in text.lower():
         data = rss_feed.get_live_feed()
@@ -901,30 +1134,55 @@ def handle_text_message(event):
             handle_standings(standings_pb)
         else:
             print_help(event)
+    if '@bot subscribe=' in text.lower() or '@bot unsubscribe=' in text.lower():
+        topic_name = text.lower().split('=')[1].strip()
+        if topic_name == 'tv':
+            topic = LIVE_TV_TOPIC
+        elif topic_name in league_competitions:
+            topic = league_topic(topic_name)
+        else:
+            print_help(event)
+            return
+        if '@bot subscribe=' in text.lower():
+            subscriptions.subscribe(topic, event.source.sender_id)
+            reply = 'Subscribed: {0}'.format(topic_name)
+        else:
+            subscriptions.unsubscribe(topic, event.source.sender_id)
+            reply = 'Unsubscribed: {0}'.format(topic_name)
+        line_bot_api.reply_message(event.reply_token, messages=TextSendMessage(text=reply))
+        return
+    if '@bot timezone=' in text.lower():
+        try:
+            zone = chat_time_zones.set(event.source.sender_id, text.split('=', 1)[1].strip())
+        except pytz.UnknownTimeZoneError:
+            print_help(event)
+            return
+        line_bot_api.reply_message(event.reply_token, messages=TextSendMessage(text='Time zone: {0}'.format(zone)))
+        return
 
     if text.lower() == 'news=bbc-sport':
-        data = rss_feed.get_bbc_feed(5)
+        data = get_news('bbc', 5)
         result = football_news.get_news_bubble("#FEE63E", data)
     if text.lower() == 'news=sky-sport':
-        data = rss_feed.get_skysports_feed(5)
+        data = get_news('skysports', 5)
         result = football_news.get_news_bubble("#BB0211", data, header_text_color="#ffffff")
     if text.lower() == 'news=goal.com':
-        data = rss_feed.get_goal_feed(5)
+        data = get_news('goal', 5)
         result = football_news.get_news_bubble("#091F2C", data, header_text_color="#ffffff")
     if text.lower() == 'news=guardian':
-        data = rss_feed.get_guardian_feed(5)
+        data = get_news('guardian', 5)
         result = football_news.get_news_bubble("#09508D", data, header_text_color="#ffffff")
     if text.lower() == 'news=mirror':
-        data = rss_feed.get_mirror_feed(5)
+        data = get_news('mirror', 5)
         result = football_news.get_news_bubble("#E80E0D", data, header_text_color="#ffffff")
     if text.lower() == 'news=shotongoal':
-        data = rss_feed.get_shot_on_goal_feed(5)
+        data = get_news('shotongoal', 5)
         result = football_news.get_news_bubble("#1A1A1A", data, header_text_color="#ffffff")
     if text.lower() == 'news=soccersuck':
-        data = rss_feed.get_soccersuck_feed(5)
+        data = get_news('soccersuck', 5)
         result = football_news.get_news_bubble("#197F4D", data)
     if text.lower() == 'news=dailymail':
-        data = rss_feed.get_daily_mail_feed(5)
+        data = get_news('dailymail', 5)
         result = football_news.get_news_bubble("#ffffff", data)
     if text.lower() == '@bot allnews':
         get_all_news(event.reply_token)
@@ -934,6 +1192,7 @@ def handle_text_message(event):
 
 
 @handler.add(FollowEvent)
+@instrumented
 def handle_follow(event):
     _transition_rich_menu(event.source.user_id, MAIN_MENU_CHAT_BAR)
 
@@ -0,0 +1,47 @@
+import json
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flag_lookup import EmojiFlagIndex  # noqa: E402
+
+# a 30-man squad with the nationality spellings football-data.org returns
+SQUAD_NATIONALITIES = [
+    'England', 'England', 'England', 'England', 'England', 'Spain', 'Spain', 'France', 'France',
+    'Brazil', 'Brazil', 'Argentina', 'Portugal', 'Portugal', 'Belgium', 'Netherlands', 'Germany',
+    'Wales', 'Scotland', 'Northern Ireland', 'Republic of Ireland', 'Korea Republic', 'Egypt',
+    'Senegal', 'Guinea', 'Equatorial Guinea', 'Ivory Coast', 'Serbia', 'Sweden', 'Norway'
+]
+
+
+def linear_scan(flags, country):
+    for flag in flags:
+        if country.lower() in flag['name'].lower():
+            return flag['emoji']
+    return ''
+
+
+def main():
+    with open(os.path.join(ROOT, 'emoji_flags.json')) as f:
+        flags = json.load(f)
+    index = EmojiFlagIndex(flags)
+    number = 1000
+
+    scan_time = timeit.timeit(lambda: [linear_scan(flags, c) for c in SQUAD_NATIONALITIES], number=number)
+    index_time = timeit.timeit(lambda: [index.get(c) for c in SQUAD_NATIONALITIES], number=number)
+    build_time = timeit.timeit(lambda: EmojiFlagIndex(flags), number=100) / 100
+
+    print('squads rendered:  {0}'.format(number))
+    print('linear scan:      {0:.2f} us/squad'.format(scan_time / number * 1e6))
+    print('indexed lookup:   {0:.2f} us/squad'.format(index_time / number * 1e6))
+    print('speedup:          {0:.1f}x'.format(scan_time / index_time))
+    print('index build:      {0:.2f} ms (once per process)'.format(build_time * 1e3))
+    for country in ('Guinea', 'Equatorial Guinea', 'Ireland', 'Ivory Coast'):
+        print('{0:<18} scan={1} index={2}'.format(country, linear_scan(flags, country), index.get(country)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import sys
+import threading
+from time import sleep
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from linebot.models import TextSendMessage  # noqa: E402
+
+import http_client  # noqa: E402
+from fanout import FanOut  # noqa: E402
+
+
+class FakeResponse(object):
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.headers = {}
+        self.text = ''
+
+
+class FakeLineApi(object):
+    # stands in for api.line.me: fixed latency per call and an occasional 429
+
+    def __init__(self, latency, throttle_every):
+        self.latency = latency
+        self.throttle_every = throttle_every
+        self.calls = 0
+        self.recipients = 0
+        self._lock = threading.Lock()
+
+    def post(self, url, data=None, headers=None):
+        sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            if self.throttle_every and self.calls % self.throttle_every == 0:
+                return FakeResponse(429)
+            to = json.loads(data.decode('utf-8'))['to']
+            self.recipients += len(to) if isinstance(to, list) else 1
+        return FakeResponse(200)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Broadcast throughput against a simulated LINE API.')
+    parser.add_argument('--users', type=int, default=5000)
+    parser.add_argument('--groups', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.08, help='seconds per API call')
+    parser.add_argument('--throttle-every', type=int, default=25, help='answer every Nth call with 429')
+    args = parser.parse_args()
+
+    chat_ids = ['U{0:032x}'.format(i) for i in range(args.users)] + \
+               ['C{0:032x}'.format(i) for i in range(args.groups)]
+    message = TextSendMessage(text='โปรแกรมถ่ายทอดสดฟุตบอล')
+
+    fake = FakeLineApi(args.latency, args.throttle_every)
+    http_client.session = fake
+    fanout = FanOut('benchmark', backoff_factor=0.05)
+    result = fanout.send(chat_ids, message)
+    print('fan-out:  {0} chats in {1:.2f} s, {2} requests, {3} retries, {4} delivered, {5} failed'.format(
+        len(chat_ids), result['seconds'], fanout.stats()['requests'], fanout.stats()['retries'],
+        result['delivered'], result['failed']))
+    assert fake.recipients == len(chat_ids), fake.recipients
+
+    # the previous approach: one push_message per chat, one after another
+    sequential = len(chat_ids) * args.latency
+    print('one push per chat, sequential: about {0:.1f} s'.format(sequential))
+    print('speedup:  {0:.0f}x'.format(sequential / result['seconds']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import feedparser  # noqa: E402
+
+import feed_stream  # noqa: E402
+from rss_feed import FEED_SOURCES  # noqa: E402
+
+# copies downloaded with --save, otherwise the fixtures the tests use
+FEEDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'feeds')
+FIXTURES_DIR = os.path.join(ROOT, 'tests', 'feeds')
+
+
+def save_feeds(feeds_dir):
+    import http_client
+    if not os.path.isdir(feeds_dir):
+        os.makedirs(feeds_dir)
+    for name, source in sorted(FEED_SOURCES.items()):
+        response = http_client.session.get(source['url'])
+        with open(os.path.join(feeds_dir, name + '.xml'), 'wb') as f:
+            f.write(response.content)
+        print('saved {0} ({1} bytes)'.format(name, len(response.content)))
+
+
+def time_call(func, number):
+    return timeit.timeit(func, number=number) / number * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare feedparser with the streaming RSS parser.')
+    parser.add_argument('--feeds-dir', default=None)
+    parser.add_argument('--save', action='store_true', help='download fresh copies of every source first')
+    parser.add_argument('--limit', type=int, default=5)
+    parser.add_argument('--number', type=int, default=20)
+    args = parser.parse_args()
+
+    feeds_dir = args.feeds_dir or FEEDS_DIR
+    if args.save:
+        save_feeds(feeds_dir)
+    elif args.feeds_dir is None and not os.path.isdir(feeds_dir):
+        feeds_dir = FIXTURES_DIR
+    if not os.path.isdir(feeds_dir):
+        print('no saved feeds in {0}, run with --save first'.format(feeds_dir))
+        return
+
+    print('{0:<12} {1:>6} {2:>8} {3:>12} {4:>12} {5:>12} {6:>8}'.format(
+        'feed', 'items', 'KB', 'feedparser', 'stream all', 'stream top', 'speedup'))
+    for file_name in sorted(os.listdir(feeds_dir)):
+        if not file_name.endswith('.xml'):
+            continue
+        with open(os.path.join(feeds_dir, file_name), 'rb') as f:
+            content = f.read()
+        name = file_name[:-4]
+        items = len(feedparser.parse(content).entries)
+        feedparser_ms = time_call(lambda: feedparser.parse(content), args.number)
+        try:
+            stream_all_ms = time_call(lambda: feed_stream.parse(content), args.number)
+            stream_top_ms = time_call(lambda: feed_stream.parse(content, args.limit), args.number)
+        except feed_stream.StreamParseError as e:
+            print('{0:<12} falls back to feedparser: {1}'.format(name, e))
+            continue
+        print('{0:<12} {1:>6} {2:>8.1f} {3:>10.2f}ms {4:>10.2f}ms {5:>10.2f}ms {6:>7.1f}x'.format(
+            name, items, len(content) / 1024.0, feedparser_ms, stream_all_ms, stream_top_ms,
+            feedparser_ms / stream_top_ms))
+
+
+if __name__ == '__main__':
+    main()
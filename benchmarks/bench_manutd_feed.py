@@ -0,0 +1,90 @@
+import argparse
+import os
+import sys
+import timeit
+import xml.etree.ElementTree as ElementTree
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from rss_feed import RssFeed, MANUTD_RSS_FEED  # noqa: E402
+
+# read with --items 0: a copy downloaded with --save, otherwise the fixture the tests use
+FEED_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'feeds', 'manutd.xml')
+FIXTURE_FILE = os.path.join(ROOT, 'tests', 'feeds', 'manutd.xml')
+
+ITEM_TEMPLATE = '''<item>
+<category>{category}</category><title>Story {index}</title>
+<newstext>&lt;p&gt;Body of story {index}&lt;/p&gt;</newstext>
+<link>https://www.manutd.com/en/news/detail/story-{index}</link>
+<pubDate>Sat, 20 Oct 2018 10:{minute:02d}:00 GMT</pubDate>
+<image>http://img/{index}/s.jpg</image><image>http://img/{index}/m.jpg</image>
+<image>http://img/{index}/l.jpg</image><image>http://img/{index}/xl.jpg</image>
+</item>'''
+
+
+def synthetic_feed(items):
+    body = ''.join(ITEM_TEMPLATE.format(category='Video' if i % 3 == 0 else 'News', index=i, minute=i % 60)
+                   for i in range(items))
+    return '<rss><channel><title>Manchester United</title>{0}</channel></rss>'.format(body).encode('utf-8')
+
+
+def absolute_query_scan(content, limit):
+    # the previous implementation: every lookup searches the whole document
+    root = ElementTree.fromstring(content)
+    entries = []
+    for item in root.findall('.//item'):
+        if len(entries) > limit - 1:
+            break
+        category = root.findall('.//category')[0].text
+        if category.lower() == 'news':
+            entries.append(
+                {
+                    'title': root.findall('.//title')[0].text,
+                    'link': root.findall('.//link')[0].text,
+                    'publish_date': root.findall('.//pubDate')[0].text,
+                    'image_url': root.findall('.//image')[3].text
+                }
+            )
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the Manchester United feed extraction.')
+    parser.add_argument('--feed-file', default=None)
+    parser.add_argument('--save', action='store_true', help='download a fresh copy of the feed first')
+    parser.add_argument('--items', type=int, default=300,
+                        help='items in the synthetic feed, 0 reads the feed file instead')
+    parser.add_argument('--limit', type=int, default=5)
+    parser.add_argument('--number', type=int, default=50)
+    args = parser.parse_args()
+
+    feed_file = args.feed_file or FEED_FILE
+    if args.save:
+        import http_client
+        if not os.path.isdir(os.path.dirname(os.path.abspath(feed_file))):
+            os.makedirs(os.path.dirname(os.path.abspath(feed_file)))
+        response = http_client.session.get(MANUTD_RSS_FEED)
+        with open(feed_file, 'wb') as f:
+            f.write(response.content)
+    elif args.feed_file is None and not os.path.exists(feed_file):
+        feed_file = FIXTURE_FILE
+    if args.items and args.feed_file is None and not args.save:
+        content = synthetic_feed(args.items)
+    else:
+        with open(feed_file, 'rb') as f:
+            content = f.read()
+
+    rss_feed = RssFeed()
+    # html2text is imported on first use, keep that out of the timings
+    rss_feed.parse_manutd_feed(content, 10 ** 6)
+    for limit in (args.limit, 10 ** 6):
+        old_ms = timeit.timeit(lambda: absolute_query_scan(content, limit), number=args.number) / args.number * 1e3
+        new_ms = timeit.timeit(lambda: rss_feed.parse_manutd_feed(content, limit), number=args.number) / args.number * 1e3
+        label = 'all items' if limit == 10 ** 6 else 'limit={0}'.format(limit)
+        print('{0:<10} absolute xpath: {1:8.2f}ms  single pass: {2:8.2f}ms  {3:6.1f}x'.format(
+            label, old_ms, new_ms, old_ms / new_ms))
+
+
+if __name__ == '__main__':
+    main()
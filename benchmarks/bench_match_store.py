@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from match_store import SeasonIndex  # noqa: E402
+
+# competition id: (name, teams, matches in the season)
+LEAGUES = {
+    '2021': ('Premier League', 20, 380),
+    '2001': ('UEFA Champions League', 32, 125),
+    '2014': ('Primera Division', 20, 380),
+    '2002': ('Bundesliga', 18, 306),
+    '2019': ('Serie A', 20, 380)
+}
+
+
+def synthetic_season(competition_id, name, teams, matches):
+    # shaped like a football-data.org v2 /competitions/{id}/matches response
+    rng = random.Random(int(competition_id))
+    start = datetime(2018, 8, 10, 14)
+    per_matchday = max(1, teams // 2)
+    data = []
+    for i in range(matches):
+        matchday = i // per_matchday + 1
+        home, away = rng.sample(range(teams), 2)
+        kickoff = start + timedelta(days=7 * (matchday - 1), hours=rng.choice([0, 2, 4, 26, 28]))
+        finished = matchday < 20
+        data.append({
+            'id': int(competition_id) * 1000 + i,
+            'season': {'id': 151, 'startDate': '2018-08-10', 'endDate': '2019-05-12', 'currentMatchday': 20},
+            'utcDate': kickoff.strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'status': 'FINISHED' if finished else 'SCHEDULED',
+            'matchday': matchday,
+            'stage': 'REGULAR_SEASON',
+            'group': 'Regular Season',
+            'lastUpdated': '2019-01-01T00:00:00Z',
+            'score': {
+                'winner': 'HOME_TEAM' if finished else None,
+                'duration': 'REGULAR',
+                'fullTime': {'homeTeam': 2 if finished else None, 'awayTeam': 1 if finished else None},
+                'halfTime': {'homeTeam': 1 if finished else None, 'awayTeam': 0 if finished else None},
+                'extraTime': {'homeTeam': None, 'awayTeam': None},
+                'penalties': {'homeTeam': None, 'awayTeam': None}
+            },
+            'homeTeam': {'id': int(competition_id) * 100 + home, 'name': '{0} Team {1} FC'.format(name, home)},
+            'awayTeam': {'id': int(competition_id) * 100 + away, 'name': '{0} Team {1} FC'.format(name, away)},
+            'referees': [{'id': 11580, 'name': 'Some Referee', 'nationality': None}]
+        })
+    return {'count': len(data), 'competition': {'id': int(competition_id), 'name': name}, 'matches': data}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Memory and lookup cost of the season match index.')
+    parser.add_argument('--number', type=int, default=1000)
+    args = parser.parse_args()
+
+    payloads = dict((competition_id, json.dumps(synthetic_season(competition_id, *league)).encode('utf-8'))
+                    for competition_id, league in LEAGUES.items())
+
+    print('{0:24s} {1:>8s} {2:>12s} {3:>12s}'.format('competition', 'matches', 'json bytes', 'index bytes'))
+    indexes = dict()
+    total = 0
+    for competition_id, payload in payloads.items():
+        resp_json = json.loads(payload.decode('utf-8'))
+        tracemalloc.start()
+        index = SeasonIndex.from_response(resp_json)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del resp_json
+        indexes[competition_id] = index
+        total += size
+        print('{0:24s} {1:8d} {2:12d} {3:12d}'.format(index.competition_name, len(index.matches), len(payload), size))
+    print('{0:24s} {1:8d} {2:12d} {3:12d}'.format('total', sum(len(i.matches) for i in indexes.values()),
+                                                 sum(len(p) for p in payloads.values()), total))
+
+    index = indexes['2021']
+    payload = payloads['2021']
+
+    def upstream_matchday():
+        # what each request used to do: decode a matchday slice from the response cache
+        return [m for m in json.loads(payload.decode('utf-8'))['matches'] if m['matchday'] == 20]
+
+    lookups = [
+        ('fixtures (matchday)', lambda: index.matchday(20)),
+        ('results (matchday, status)', lambda: index.matchday(19, frozenset(['FINISHED']))),
+        ('full season json decode', upstream_matchday)
+    ]
+    print()
+    for name, lookup in lookups:
+        us = timeit.timeit(lookup, number=args.number) / args.number * 1e6
+        print('{0:28s} {1:10.2f} us'.format(name, us))
+
+
+if __name__ == '__main__':
+    main()
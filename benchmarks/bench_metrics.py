@@ -0,0 +1,37 @@
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import metrics  # noqa: E402
+
+
+def main():
+    registry = metrics.Registry()
+    seconds = registry.histogram('bench_seconds', 'benchmark', ('handler',))
+    errors = registry.counter('bench_errors_total', 'benchmark', ('handler',))
+    for name in ('handle_fixtures', 'handle_results', 'handle_standings', 'handle_teams', 'get_all_news'):
+        seconds.observe(0.1, name)
+
+    def handle_fixtures():
+        return None
+
+    instrumented = metrics.instrument(seconds, errors)(handle_fixtures)
+    number = 200000
+    cases = [
+        ('plain call', handle_fixtures),
+        ('instrumented call', instrumented),
+        ('histogram.observe', lambda: seconds.observe(0.042, 'handle_fixtures')),
+        ('counter.inc', lambda: errors.inc('handle_fixtures'))
+    ]
+    for name, func in cases:
+        ns = timeit.timeit(func, number=number) / number * 1e9
+        print('{0:20s} {1:8.0f} ns'.format(name, ns))
+    scrape_ms = timeit.timeit(registry.expose, number=100) / 100 * 1e3
+    print('{0:20s} {1:8.3f} ms'.format('expose (scrape)', scrape_ms))
+
+
+if __name__ == '__main__':
+    main()
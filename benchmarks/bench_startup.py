@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['feedparser', 'bs4', 'html2text', 'dateparser', 'requests_xml']
+
+# runs in a fresh interpreter so nothing is already imported
+PROBE = '''
+import json, resource, sys, time
+start = time.perf_counter()
+import app  # noqa: F401
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == 'darwin':
+    rss /= 1024
+print(json.dumps({{
+    'import_ms': elapsed * 1e3,
+    'max_rss_mb': rss / 1024.0,
+    'heavy': [name for name in {heavy!r} if name in sys.modules],
+}}))
+'''
+
+
+def probe_env():
+    env = dict(os.environ)
+    env.setdefault('LINE_CHANNEL_SECRET', 'benchmark')
+    env.setdefault('LINE_CHANNEL_ACCESS_TOKEN', 'benchmark')
+    # keep background threads from calling feeds, football-data and the LINE API while we measure
+    env['FEED_POLLER'] = 'off'
+    env['LIVE_SCORES'] = 'off'
+    env['DIRECTORY_WARMUP'] = 'off'
+    return env
+
+
+def run_probe(extra_args=()):
+    return subprocess.run([sys.executable] + list(extra_args) + ['-c', PROBE.format(heavy=HEAVY_MODULES)],
+                          cwd=ROOT, env=probe_env(), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True)
+
+
+def slowest_imports(stderr, top):
+    # -X importtime lines: "import time: self [us] | cumulative | imported package"
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the cold start of the web process.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15, help='slowest imports to list')
+    parser.add_argument('--budget-ms', type=float, help='fail when the median import time is higher')
+    parser.add_argument('--budget-mb', type=float, help='fail when the peak resident memory is higher')
+    args = parser.parse_args()
+
+    results = []
+    for _ in range(args.runs):
+        completed = run_probe()
+        if completed.returncode != 0:
+            print(completed.stderr)
+            sys.exit('importing app failed')
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    import_ms = sorted(result['import_ms'] for result in results)[len(results) // 2]
+    max_rss_mb = max(result['max_rss_mb'] for result in results)
+    heavy = results[0]['heavy']
+    print('import app:  {0:8.1f} ms (median of {1})'.format(import_ms, args.runs))
+    print('max rss:     {0:8.1f} MB per worker'.format(max_rss_mb))
+    print('eager heavy: {0}'.format(', '.join(heavy) if heavy else 'none'))
+
+    print('\nslowest imports (cumulative us, self us, module):')
+    for cumulative_us, self_us, name in slowest_imports(run_probe(['-X', 'importtime']).stderr, args.top):
+        print('{0:10d} {1:10d} {2}'.format(cumulative_us, self_us, name))
+
+    failures = []
+    if args.budget_ms is not None and import_ms > args.budget_ms:
+        failures.append('import time {0:.1f} ms is over the {1:.1f} ms budget'.format(import_ms, args.budget_ms))
+    if args.budget_mb is not None and max_rss_mb > args.budget_mb:
+        failures.append('resident memory {0:.1f} MB is over the {1:.1f} MB budget'.format(max_rss_mb, args.budget_mb))
+    if failures:
+        sys.exit('\n'.join(failures))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import timeit
+from datetime import timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from thai_date import THAI_MONTHS, parse_thai_date, thai_today  # noqa: E402
+
+THAI_WEEKDAYS = ['จันทร์', 'อังคาร', 'พุธ', 'พฤหัสบดี', 'ศุกร์', 'เสาร์', 'อาทิตย์']
+MONTH_NAMES = dict((number, name) for name, number in THAI_MONTHS.items() if not name.endswith('.'))
+
+
+def schedule_date(day):
+    return 'วัน{0}ที่ {1} {2} {3}'.format(THAI_WEEKDAYS[day.weekday()], day.day, MONTH_NAMES[day.month],
+                                        day.year + 543)
+
+
+def dateparser_is_today(date_str):
+    # the previous implementation of RssFeed.is_today_in_thai
+    import dateparser
+    date_obj = dateparser.parse(date_str, languages=['th'])
+    today = dateparser.parse('today 00:00')
+    today = today.replace(year=today.year + 543)
+    return date_obj == today
+
+
+def main():
+    # one week of schedule blocks, as the live command receives them
+    start = thai_today() - timedelta(days=3)
+    blocks = [schedule_date(start + timedelta(days=i)) for i in range(7)]
+
+    number = 20
+
+    def fast():
+        parse_thai_date.cache_clear()
+        today = thai_today()
+        return [parse_thai_date(block) == today for block in blocks]
+
+    fast_ms = timeit.timeit(fast, number=number) / number * 1e3
+    print('thai_date:   {0:8.3f} ms per live schedule ({1} blocks)'.format(fast_ms, len(blocks)))
+    try:
+        import dateparser  # noqa: F401
+    except ImportError:
+        print('dateparser is not installed, skipping the comparison')
+        return
+    dateparser_is_today(blocks[0])
+    slow_ms = timeit.timeit(lambda: [dateparser_is_today(block) for block in blocks], number=number) / number * 1e3
+    print('dateparser:  {0:8.3f} ms per live schedule'.format(slow_ms))
+    print('speedup:     {0:8.1f}x'.format(slow_ms / fast_ms))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+import threading
+from collections import OrderedDict
+from time import time
+
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+
+class ResponseCache(object):
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, backend=None):
+        self.max_bytes = max_bytes
+        self.backend = backend
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.backend_hits = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, allow_stale=False):
+        # expired entries stay until evicted so they can be served when upstream is unavailable
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, expires_at = entry
+                if expires_at >= time() or allow_stale:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+        if self.backend is not None:
+            stored = self.backend.get(key)
+            if stored is not None:
+                value, expires_at = stored
+                if expires_at >= time() or allow_stale:
+                    self._store(key, value, expires_at, len(value))
+                    with self._lock:
+                        self.hits += 1
+                        self.backend_hits += 1
+                    return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value, ttl, size):
+        expires_at = time() + ttl
+        self._store(key, value, expires_at, size)
+        if self.backend is not None:
+            self.backend.set(key, value, expires_at)
+
+    def _store(self, key, value, expires_at, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def _remove(self, key):
+        value, size, expires_at = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'backend_hits': self.backend_hits,
+                'hit_ratio': float(self.hits) / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes
+            }
@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import threading
+from time import time
+
+# Heroku Postgres sets DATABASE_URL; without it chat state is kept in a local sqlite file
+DATABASE_URL = os.getenv('DATABASE_URL')
+CHAT_DB_PATH = os.getenv('CHAT_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chats.db'))
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS subscriptions ('
+    'topic TEXT NOT NULL, chat_id TEXT NOT NULL, PRIMARY KEY (topic, chat_id))',
+    'CREATE TABLE IF NOT EXISTS chat_settings (chat_id TEXT PRIMARY KEY, time_zone TEXT NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS leases ('
+    'name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at DOUBLE PRECISION NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS token_buckets ('
+    'name TEXT PRIMARY KEY, tokens DOUBLE PRECISION NOT NULL, updated_at DOUBLE PRECISION NOT NULL)'
+)
+
+
+class ChatStore(object):
+
+    def __init__(self, database_url=DATABASE_URL, path=CHAT_DB_PATH):
+        self.database_url = database_url
+        self.path = path
+        self._local = threading.local()
+        if database_url:
+            # psycopg2 is only needed when a Postgres database is configured
+            import psycopg2
+            self._driver = psycopg2
+            self._placeholder = '%s'
+        else:
+            self._driver = sqlite3
+            self._placeholder = '?'
+        for statement in SCHEMA:
+            self._execute(statement)
+
+    def _connection(self):
+        # one connection per thread, every statement commits on its own
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            if self.database_url:
+                connection = self._driver.connect(self.database_url)
+                connection.autocommit = True
+            else:
+                connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+                connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    def _execute(self, sql, params=()):
+        try:
+            cursor = self._connection().cursor()
+            cursor.execute(sql.replace('?', self._placeholder), params)
+        except (self._driver.OperationalError, self._driver.InterfaceError):
+            # reconnect on the next statement, e.g. after the database restarted
+            self._local.connection = None
+            raise
+        return cursor
+
+    def subscribe(self, topic, chat_id):
+        try:
+            self._execute('INSERT INTO subscriptions (topic, chat_id) VALUES (?, ?)', (topic, chat_id))
+        except self._driver.IntegrityError:
+            # already subscribed
+            return False
+        return True
+
+    def unsubscribe(self, topic, chat_id):
+        cursor = self._execute('DELETE FROM subscriptions WHERE topic = ? AND chat_id = ?', (topic, chat_id))
+        return cursor.rowcount > 0
+
+    def subscribers(self, topic):
+        cursor = self._execute('SELECT chat_id FROM subscriptions WHERE topic = ? ORDER BY chat_id', (topic,))
+        return [row[0] for row in cursor.fetchall()]
+
+    def subscription_counts(self):
+        # (topic, first letter of the chat id, count)
+        cursor = self._execute('SELECT topic, substr(chat_id, 1, 1), COUNT(*) FROM subscriptions '
+                               'GROUP BY topic, substr(chat_id, 1, 1)')
+        return cursor.fetchall()
+
+    def get_time_zone(self, chat_id):
+        row = self._execute('SELECT time_zone FROM chat_settings WHERE chat_id = ?', (chat_id,)).fetchone()
+        return row[0] if row is not None else None
+
+    def set_time_zone(self, chat_id, zone):
+        # a concurrent first insert for the same chat is retried as an update
+        if self._execute('UPDATE chat_settings SET time_zone = ? WHERE chat_id = ?', (zone, chat_id)).rowcount > 0:
+            return
+        try:
+            self._execute('INSERT INTO chat_settings (chat_id, time_zone) VALUES (?, ?)', (chat_id, zone))
+        except self._driver.IntegrityError:
+            self._execute('UPDATE chat_settings SET time_zone = ? WHERE chat_id = ?', (zone, chat_id))
+
+    def acquire_lease(self, name, owner, ttl):
+        # true while owner holds the lease: it is renewed by its owner and taken over by anyone once expired
+        now = time()
+        cursor = self._execute('UPDATE leases SET owner = ?, expires_at = ? '
+                               'WHERE name = ? AND (owner = ? OR expires_at < ?)',
+                               (owner, now + ttl, name, owner, now))
+        if cursor.rowcount > 0:
+            return True
+        try:
+            self._execute('INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?)', (name, owner, now + ttl))
+        except self._driver.IntegrityError:
+            # held by another worker
+            return False
+        return True
+
+    def take_token(self, name, rate, capacity):
+        # refills and takes in one UPDATE, so workers sharing the database share the bucket;
+        # returns 0 when a token was taken, otherwise the seconds until one is due
+        now = time()
+        level = 'CASE WHEN tokens + (? - updated_at) * ? > ? THEN ? ELSE tokens + (? - updated_at) * ? END'
+        cursor = self._execute('UPDATE token_buckets SET tokens = ' + level + ' - 1, updated_at = ? '
+                               'WHERE name = ? AND ' + level + ' >= 1',
+                               (now, rate, capacity, capacity, now, rate, now, name) +
+                               (now, rate, capacity, capacity, now, rate))
+        if cursor.rowcount > 0:
+            return 0
+        row = self._execute('SELECT tokens, updated_at FROM token_buckets WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            try:
+                self._execute('INSERT INTO token_buckets (name, tokens, updated_at) VALUES (?, ?, ?)',
+                              (name, capacity - 1, now))
+                return 0
+            except self._driver.IntegrityError:
+                # created by another worker in the meantime
+                return self.take_token(name, rate, capacity)
+        tokens = min(capacity, row[0] + (now - row[1]) * rate)
+        return max(0.0, (1 - tokens) / rate)
@@ -1,19 +1,47 @@
 from datetime import datetime
-import time
+from email.utils import parsedate_tz, mktime_tz
+
+from match_time import DEFAULT_TIME_ZONE, get_zone
 
 format = '%a, %d %b %Y %H:%M:%S %Z'
 str_format = '%d %b %Y %H:%M:%S'
 
+# abbreviations email.utils does not know, as seconds east of UTC
+ZONE_OFFSETS = {
+    'BST': 60 * 60,
+    'CET': 60 * 60,
+    'CEST': 2 * 60 * 60
+}
+
+
+def rfc822_to_epoch(date_str):
+    # never consults the process time zone, so it is safe to call from any thread
+    parsed = parsedate_tz(date_str) if date_str else None
+    if parsed is None:
+        return None
+    zone_name = date_str.rsplit(None, 1)[-1].upper()
+    if parsed[9] is None or zone_name in ZONE_OFFSETS:
+        # email.utils reads an unknown abbreviation as UTC
+        parsed = parsed[:9] + (ZONE_OFFSETS.get(zone_name, 0),)
+    return mktime_tz(parsed)
+
 
 def convert_time_str_to_epoch(date_str):
-    utc_time = datetime.strptime(date_str, format)
-    return utc_time.timestamp()
+    epoch = rfc822_to_epoch(date_str)
+    if epoch is None:
+        raise ValueError('time data {0!r} does not match format {1!r}'.format(date_str, format))
+    return epoch
+
+
+def convert_local_str_to_epoch(date_str, date_format, zone):
+    local_dt = get_zone(zone).localize(datetime.strptime(date_str, date_format))
+    return int(local_dt.timestamp())
 
 
-def convert_epoch_to_str(epoch):
-    return time.strftime(str_format, time.localtime(epoch))
+def convert_epoch_to_str(epoch, zone=DEFAULT_TIME_ZONE):
+    return datetime.fromtimestamp(epoch, get_zone(zone)).strftime(str_format)
 
 
 if __name__ == '__main__':
     epoch = convert_time_str_to_epoch('Sat, 21 Jul 2018 06:24:03 GMT')
-    print(convert_epoch_to_str(epoch))
\ No newline at end of file
+    print(convert_epoch_to_str(epoch))
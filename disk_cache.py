@@ -0,0 +1,79 @@
+import sqlite3
+import threading
+from time import time
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+COMPACT_INTERVAL = 300
+# expired rows are kept this long so they can still be served stale
+STALE_GRACE = 24 * 60 * 60
+
+
+class DiskCache(object):
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._stop_event = threading.Event()
+        connection = self._connection()
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, expires_at REAL NOT NULL)'
+        )
+        connection.execute('CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)')
+
+    def _connection(self):
+        # sqlite connections cannot be shared between threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        row = self._connection().execute('SELECT value, expires_at FROM cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        return bytes(row[0]), row[1]
+
+    def set(self, key, value, expires_at):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO cache (key, value, size, expires_at) VALUES (?, ?, ?, ?)',
+            (key, sqlite3.Binary(value), len(value), expires_at)
+        )
+
+    def size(self):
+        return self._connection().execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+
+    def compact(self):
+        connection = self._connection()
+        connection.execute('DELETE FROM cache WHERE expires_at < ?', (time() - STALE_GRACE,))
+        excess = self.size() - self.max_bytes
+        if excess > 0:
+            # drop the rows closest to expiry until the store fits again
+            rows = connection.execute('SELECT key, size FROM cache ORDER BY expires_at').fetchall()
+            keys = []
+            for key, size in rows:
+                if excess <= 0:
+                    break
+                keys.append((key,))
+                excess -= size
+            connection.executemany('DELETE FROM cache WHERE key = ?', keys)
+        connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def start_compaction(self, interval=COMPACT_INTERVAL):
+        thread = threading.Thread(target=self._compact_loop, args=(interval,), name='disk-cache-compaction')
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _compact_loop(self, interval):
+        while not self._stop_event.wait(interval):
+            try:
+                self.compact()
+            except sqlite3.Error as e:
+                print('disk cache compaction failed: {0!r}'.format(e))
@@ -0,0 +1,111 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import sleep, time
+
+import requests
+
+import http_client
+from subscriptions import GROUP, ROOM, USER, chat_type
+
+MULTICAST_URL = 'https://api.line.me/v2/bot/message/multicast'
+PUSH_URL = 'https://api.line.me/v2/bot/message/push'
+# LINE accepts at most this many user ids per multicast call
+MULTICAST_LIMIT = 150
+
+FANOUT_WORKERS = int(os.getenv('FANOUT_WORKERS', '8'))
+FANOUT_MAX_ATTEMPTS = int(os.getenv('FANOUT_MAX_ATTEMPTS', '4'))
+FANOUT_BACKOFF_FACTOR = float(os.getenv('FANOUT_BACKOFF_FACTOR', '0.5'))
+
+
+class FanOut(object):
+
+    def __init__(self, channel_access_token, workers=FANOUT_WORKERS, max_attempts=FANOUT_MAX_ATTEMPTS,
+                 backoff_factor=FANOUT_BACKOFF_FACTOR):
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.broadcasts = 0
+        self.delivered = 0
+        self.failed = 0
+        self.requests = 0
+        self.retries = 0
+        self.last_chats = 0
+        self.last_seconds = 0.0
+        self._headers = {
+            'Authorization': 'Bearer {0}'.format(channel_access_token),
+            'Content-Type': 'application/json'
+        }
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._lock = threading.Lock()
+
+    def send(self, chat_ids, messages):
+        started = time()
+        if not isinstance(messages, (list, tuple)):
+            messages = [messages]
+        # the messages are serialized once and spliced into every request body
+        messages_json = json.dumps([message.as_json_dict() for message in messages])
+        users = [chat_id for chat_id in chat_ids if chat_type(chat_id) == USER]
+        jobs = [(MULTICAST_URL, users[i:i + MULTICAST_LIMIT]) for i in range(0, len(users), MULTICAST_LIMIT)]
+        # groups and rooms cannot be multicast to, so they get one push each, sent in parallel
+        jobs.extend((PUSH_URL, chat_id) for chat_id in chat_ids if chat_type(chat_id) in (GROUP, ROOM))
+        futures = [self._executor.submit(self._post, url, to, messages_json) for url, to in jobs]
+        delivered = 0
+        failed = 0
+        for future, (url, to) in zip(futures, jobs):
+            count = len(to) if url == MULTICAST_URL else 1
+            if future.result():
+                delivered += count
+            else:
+                failed += count
+        elapsed = time() - started
+        with self._lock:
+            self.broadcasts += 1
+            self.delivered += delivered
+            self.failed += failed
+            self.last_chats = delivered + failed
+            self.last_seconds = elapsed
+        return {
+            'delivered': delivered,
+            'failed': failed,
+            'requests': len(jobs),
+            'seconds': elapsed
+        }
+
+    def _post(self, url, to, messages_json):
+        body = '{{"to": {0}, "messages": {1}}}'.format(json.dumps(to), messages_json).encode('utf-8')
+        for attempt in range(self.max_attempts):
+            with self._lock:
+                self.requests += 1
+            delay = self.backoff_factor * (2 ** attempt)
+            try:
+                response = http_client.session.post(url, data=body, headers=self._headers)
+            except requests.RequestException as e:
+                print('fan-out to {0} failed: {1!r}'.format(to, e))
+            else:
+                if response.status_code == 200:
+                    return True
+                if response.status_code != 429 and response.status_code < 500:
+                    print('fan-out to {0} rejected: {1} {2}'.format(to, response.status_code, response.text))
+                    return False
+                retry_after = response.headers.get('Retry-After')
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+            if attempt + 1 < self.max_attempts:
+                with self._lock:
+                    self.retries += 1
+                sleep(delay)
+        return False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'broadcasts': self.broadcasts,
+                'delivered': self.delivered,
+                'failed': self.failed,
+                'requests': self.requests,
+                'retries': self.retries,
+                'last_chats': self.last_chats,
+                'last_seconds': self.last_seconds,
+                'last_chats_per_second': self.last_chats / self.last_seconds if self.last_seconds else 0.0
+            }
@@ -0,0 +1,85 @@
+import json
+import threading
+from time import time
+
+SNAPSHOT_LIMIT = 10
+# a stored snapshot stays usable for this many poll intervals
+STORE_TTL_INTERVALS = 3
+
+
+class FeedPoller(object):
+
+    def __init__(self, snapshot_limit=SNAPSHOT_LIMIT, store=None):
+        self.snapshot_limit = snapshot_limit
+        self.store = store
+        self._sources = {}
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    def add_source(self, name, fetch, interval, oldest_first=False):
+        # oldest_first: the snapshot lists its newest entries last, so get() keeps the tail
+        self._sources[name] = (fetch, interval, oldest_first)
+
+    def refresh(self, name):
+        fetch, interval, oldest_first = self._sources[name]
+        data = fetch(self.snapshot_limit)
+        fetched_at = time()
+        with self._lock:
+            self._snapshots[name] = (data, fetched_at)
+        if self.store is not None:
+            self.store.set(self._store_key(name), json.dumps(data).encode('utf-8'),
+                           fetched_at + interval * STORE_TTL_INTERVALS)
+        return data
+
+    def _store_key(self, name):
+        return 'feed:{0}:{1}'.format(name, self.snapshot_limit)
+
+    def _load(self, name):
+        # snapshot written by another worker or before a restart
+        stored = self.store.get(self._store_key(name))
+        if stored is None:
+            return None
+        content, expires_at = stored
+        if expires_at < time():
+            return None
+        fetch, interval, oldest_first = self._sources[name]
+        snapshot = (json.loads(content.decode('utf-8')), expires_at - interval * STORE_TTL_INTERVALS)
+        with self._lock:
+            self._snapshots.setdefault(name, snapshot)
+        return snapshot
+
+    def get(self, name, limit):
+        with self._lock:
+            snapshot = self._snapshots.get(name)
+        if snapshot is None and self.store is not None:
+            snapshot = self._load(name)
+        if snapshot is None or limit > self.snapshot_limit:
+            return None
+        data, fetched_at = snapshot
+        result = dict(data)
+        if self._sources[name][2]:
+            result['entries'] = data['entries'][-limit:] if limit > 0 else []
+        else:
+            result['entries'] = data['entries'][:limit]
+        return result
+
+    def start(self):
+        for name in self._sources:
+            thread = threading.Thread(target=self._poll, args=(name,), name='feed-poller-{0}'.format(name))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _poll(self, name):
+        fetch, interval, oldest_first = self._sources[name]
+        while not self._stop_event.is_set():
+            try:
+                self.refresh(name)
+            except Exception as e:
+                print('feed poller: {0} failed: {1!r}'.format(name, e))
+            self._stop_event.wait(interval)
@@ -0,0 +1,180 @@
+import calendar
+import re
+import time
+import xml.etree.ElementTree as ElementTree
+from io import BytesIO
+
+from convert_time import rfc822_to_epoch
+
+MEDIA_NS = '{http://search.yahoo.com/mrss/}'
+CONTENT_NS = '{http://purl.org/rss/1.0/modules/content/}'
+DC_NS = '{http://purl.org/dc/elements/1.1/}'
+
+ISO_DATE = re.compile(r'(\d{4})-(\d{2})-(\d{2})T(\d{2}):(\d{2}):(\d{2})(?:\.\d+)?(?:Z|([+-])(\d{2}):?(\d{2}))?$')
+
+
+class StreamParseError(Exception):
+    pass
+
+
+class StreamDict(dict):
+    # attribute access like feedparser's FeedParserDict (d.feed.image.link)
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        self[name] = value
+
+
+def _parse_date(date_str):
+    if not date_str:
+        return None
+    epoch = rfc822_to_epoch(date_str)
+    if epoch is not None:
+        return time.gmtime(epoch)
+    # W3C-DTF as used by Atom and dc:date
+    match = ISO_DATE.match(date_str)
+    if match is None:
+        return None
+    year, month, day, hour, minute, second, sign, tz_hour, tz_minute = match.groups()
+    timestamp = calendar.timegm((int(year), int(month), int(day), int(hour), int(minute), int(second), 0, 0, 0))
+    if sign:
+        offset = (int(tz_hour) * 60 + int(tz_minute)) * 60
+        timestamp = timestamp - offset if sign == '+' else timestamp + offset
+    return time.gmtime(timestamp)
+
+
+def _set_date(target, key, date_str):
+    parsed = _parse_date(date_str)
+    if parsed is not None:
+        target[key] = parsed
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _new_entry():
+    return StreamDict(media_thumbnail=[], media_content=[], links=[], enclosures=[], content=[])
+
+
+def _finish_entry(entry):
+    if 'link' in entry:
+        entry['links'].insert(0, StreamDict(rel='alternate', href=entry['link']))
+    for enclosure in entry.pop('enclosures'):
+        entry['links'].append(StreamDict(rel='enclosure', href=enclosure))
+    if 'published_parsed' not in entry and 'updated_parsed' in entry:
+        entry['published_parsed'] = entry['updated_parsed']
+    if 'updated_parsed' not in entry and 'published_parsed' in entry:
+        entry['updated_parsed'] = entry['published_parsed']
+    for key in ('media_thumbnail', 'media_content', 'links', 'content'):
+        if not entry[key]:
+            del entry[key]
+    if 'title' not in entry or 'link' not in entry or 'published_parsed' not in entry:
+        raise StreamParseError('entry without title, link or date')
+    return entry
+
+
+def _apply_entry_element(entry, elem):
+    tag = elem.tag
+    name = _local_name(tag)
+    text = (elem.text or '').strip()
+    if tag == MEDIA_NS + 'thumbnail':
+        entry['media_thumbnail'].append(StreamDict(url=elem.get('url')))
+    elif tag == MEDIA_NS + 'content':
+        entry['media_content'].append(StreamDict(url=elem.get('url')))
+    elif tag.startswith(MEDIA_NS):
+        # media:title, media:credit and the like describe the image, not the entry
+        return
+    elif tag == CONTENT_NS + 'encoded':
+        entry['content'].append(StreamDict(value=elem.text or ''))
+    elif name == 'enclosure' and elem.get('url'):
+        entry['enclosures'].append(elem.get('url'))
+    elif name == 'title':
+        entry['title'] = text
+    elif name == 'link':
+        href = elem.get('href')
+        if href is not None:
+            if elem.get('rel', 'alternate') == 'alternate' and 'link' not in entry:
+                entry['link'] = href
+        elif text:
+            entry['link'] = text
+    elif name == 'pubDate' or name == 'published':
+        _set_date(entry, 'published_parsed', text)
+    elif name == 'updated' or tag == DC_NS + 'date':
+        _set_date(entry, 'updated_parsed', text)
+    elif name not in entry and text:
+        entry[name] = text
+
+
+def _apply_feed_element(feed, elem, parent_name):
+    name = _local_name(elem.tag)
+    text = (elem.text or '').strip()
+    if parent_name == 'image':
+        if name == 'link':
+            feed.setdefault('image', StreamDict())['link'] = text
+        return
+    if name == 'title':
+        feed['title'] = text
+    elif name == 'link':
+        href = elem.get('href')
+        if href is not None:
+            if elem.get('rel', 'alternate') == 'alternate':
+                feed['link'] = href
+        elif text:
+            feed['link'] = text
+    elif name in ('lastBuildDate', 'updated', 'pubDate'):
+        if 'updated_parsed' not in feed or name == 'lastBuildDate':
+            _set_date(feed, 'updated_parsed', text)
+
+
+def _has_field(value, path):
+    for key in path:
+        if not isinstance(value, dict) or key not in value:
+            return False
+        value = value[key]
+    return True
+
+
+def parse(content, limit=None, feed_fields=(), entry_fields=()):
+    # feed_fields and entry_fields are key paths the caller reads, e.g. ('image', 'link');
+    # a feed without them is reported as a parse error so the caller can use feedparser instead
+    feed = StreamDict()
+    entries = []
+    path = []
+    entry = None
+    try:
+        for event, elem in ElementTree.iterparse(BytesIO(content), events=('start', 'end')):
+            name = _local_name(elem.tag)
+            if event == 'start':
+                path.append(name)
+                if name in ('item', 'entry'):
+                    entry = _new_entry()
+                continue
+            path.pop()
+            if name in ('item', 'entry'):
+                entries.append(_finish_entry(entry))
+                entry = None
+                elem.clear()
+                if limit is not None and len(entries) >= limit:
+                    break
+            elif entry is not None:
+                if path[-1] in ('item', 'entry') or elem.tag.startswith(MEDIA_NS):
+                    _apply_entry_element(entry, elem)
+            elif path and path[-1] in ('channel', 'feed', 'image'):
+                _apply_feed_element(feed, elem, path[-1])
+    except ElementTree.ParseError as e:
+        raise StreamParseError(str(e))
+    if 'title' not in feed or not entries:
+        raise StreamParseError('not an RSS or Atom feed')
+    for path in feed_fields:
+        if not _has_field(feed, path):
+            raise StreamParseError('feed has no {0}'.format('.'.join(path)))
+    for path in entry_fields:
+        if not all(_has_field(entry, path) for entry in entries):
+            raise StreamParseError('entry has no {0}'.format('.'.join(path)))
+    return StreamDict(feed=feed, entries=entries, bozo=0)
@@ -0,0 +1,67 @@
+import json
+
+# football-data.org nationality spelling: name in emoji_flags.json
+nationality_aliases = {
+    'Bosnia-Herzegovina': 'Bosnia and Herzegovina',
+    'Cape Verde Islands': 'Cape Verde',
+    'China PR': 'China',
+    'Chinese Taipei': 'Taiwan',
+    'Curacao': 'Curaçao',
+    'Czechia': 'Czech Republic',
+    'Ivory Coast': "Côte D'Ivoire",
+    "Cote d'Ivoire": "Côte D'Ivoire",
+    'Ireland': 'Republic of Ireland',
+    'Korea DPR': 'North Korea',
+    'South Korea': 'Korea Republic',
+    'Laos': "Lao People's Democratic Republic",
+    'Macedonia': 'FYR Macedonia',
+    'North Macedonia': 'FYR Macedonia',
+    'Brunei': 'Brunei Darussalam',
+    'Palestine': 'Palestinian Territory',
+    'St. Kitts and Nevis': 'Saint Kitts and Nevis',
+    'St. Lucia': 'Saint Lucia',
+    'St. Vincent / Grenadines': 'Saint Vincent and The Grenadines',
+    'Syria': 'Syrian Arab Republic',
+    'USA': 'United States',
+    'United States of America': 'United States',
+    'Vietnam': 'Viet Nam',
+    'Eswatini': 'Swaziland',
+    'Holland': 'Netherlands'
+}
+
+
+class EmojiFlagIndex(object):
+
+    def __init__(self, flags, aliases=nationality_aliases):
+        self._exact = {}
+        for flag in flags:
+            self._exact.setdefault(flag['name'].lower(), flag['emoji'])
+        for alias, name in aliases.items():
+            emoji = self._exact.get(name.lower())
+            if emoji is not None:
+                self._exact.setdefault(alias.lower(), emoji)
+        # shortest names first so "Guinea" never resolves to "Equatorial Guinea"
+        self._fallback = [(flag['name'].lower(), flag['emoji']) for flag in sorted(flags, key=lambda f: len(f['name']))]
+        self._resolved = {}
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def get(self, country):
+        if not country:
+            return ''
+        key = country.lower()
+        emoji = self._exact.get(key)
+        if emoji is not None:
+            return emoji
+        emoji = self._resolved.get(key)
+        if emoji is None:
+            emoji = ''
+            for name, flag_emoji in self._fallback:
+                if key in name:
+                    emoji = flag_emoji
+                    break
+            self._resolved[key] = emoji
+        return emoji
@@ -1,7 +1,16 @@
-import requests
 import json
+import os
+from urllib.parse import urlencode
 from dateutil.relativedelta import relativedelta
-from datetime import timezone, datetime, timedelta
+from datetime import datetime, timedelta
+
+import http_client
+import metrics
+from cache import ResponseCache
+from flag_lookup import EmojiFlagIndex
+from match_store import MatchStore
+from match_time import MatchTimeFormatter
+from throttle import SharedTokenBucket, SingleFlight, ThrottledError, TokenBucket
 
 
 league_competitions = {
@@ -12,6 +21,11 @@ league_competitions = {
     'calcio': '2019'
 }
 
+# statuses polled by the live score engine
+live_statuses = 'IN_PLAY,PAUSED'
+# statuses shown by get_results
+result_statuses = frozenset(['FINISHED', 'LIVE', 'IN_PLAY'])
+
 match_status = {
     'FINISHED': "FT",
     'IN_PLAY': 'LIVE',
@@ -25,71 +39,125 @@ headers = {
 base_url = 'http://api.football-data.org/v2'
 date_format = '%Y-%m-%dT%H:%M:%SZ'
 
-with open('emoji_flags.json') as f:
-    emoji_flags = json.load(f)
+# seconds to keep each kind of football-data response
+cache_ttl = {
+    'competition': 60 * 60,
+    'matches': 60,
+    'live': 15,
+    'standings': 5 * 60,
+    'team': 24 * 60 * 60
+}
+
+# football-data.org free tier allows 10 requests per minute per key
+rate_per_minute = float(os.getenv('FOOTBALL_API_RATE_PER_MINUTE', '10'))
+rate_queue_timeout = float(os.getenv('FOOTBALL_API_QUEUE_TIMEOUT', '5'))
+# gunicorn workers per dyno; a worker that cannot reach the shared bucket keeps to its share of the rate
+web_concurrency = max(1, int(os.getenv('WEB_CONCURRENCY', '1')))
+
+request_seconds = metrics.registry.histogram('football_data_request_seconds',
+                                             'Latency of football-data.org calls by endpoint.', ('endpoint',))
+
+emoji_flags_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'emoji_flags.json')
+emoji_flag_index = None
 
 
 class FootballApi(object):
 
+    def __init__(self, cache=None, rate_limiter=None, time_formatter=None, match_store=None, store=None):
+        # store is a ChatStore shared by every worker, so they all draw from the one API key budget
+        self.cache = cache if cache is not None else ResponseCache()
+        capacity = max(1, int(rate_per_minute))
+        if rate_limiter is None and store is not None:
+            rate_limiter = SharedTokenBucket(store, 'football_data', rate_per_minute / 60.0, capacity,
+                                             TokenBucket(rate_per_minute / 60.0 / web_concurrency,
+                                                         max(1, capacity // web_concurrency)))
+        self.rate_limiter = rate_limiter if rate_limiter is not None else \
+            TokenBucket(rate_per_minute / 60.0, capacity)
+        self.single_flight = SingleFlight()
+        self.time_formatter = time_formatter if time_formatter is not None else MatchTimeFormatter()
+        # league fixtures and results are served from one season-wide call per competition
+        self.match_store = match_store if match_store is not None else MatchStore(self._get)
+
+    def _get(self, path, endpoint, params=None):
+        key = path
+        if params:
+            key = '{0}?{1}'.format(path, urlencode(sorted(params.items())))
+        content = self.cache.get(key)
+        if content is None:
+            # identical concurrent requests share one upstream fetch
+            content = self.single_flight.do(key, lambda: self._fetch(path, endpoint, key, params))
+        return json.loads(content.decode('utf-8'))
+
+    def _fetch(self, path, endpoint, key, params):
+        if not self.rate_limiter.acquire(timeout=rate_queue_timeout):
+            return self._get_stale(key)
+        with request_seconds.time(endpoint):
+            response = http_client.session.get(base_url + path, params=params, headers=headers)
+        if response.status_code == 429:
+            return self._get_stale(key)
+        if response.status_code == 200:
+            self.cache.set(key, response.content, cache_ttl[endpoint], len(response.content))
+        return response.content
+
+    def _get_stale(self, key):
+        content = self.cache.get(key, allow_stale=True)
+        if content is None:
+            raise ThrottledError('football-data.org rate limit reached for {0}'.format(key))
+        return content
+
+    def stats(self):
+        stats = self.cache.stats()
+        stats['coalesced'] = self.single_flight.coalesced
+        stats['queued'] = self.rate_limiter.queued
+        stats['throttled'] = self.rate_limiter.throttled
+        stats['match_store'] = self.match_store.stats()
+        return stats
+
     def _get_current_matchday(self, league_name):
-        url = base_url + '/competitions/' + league_competitions[league_name]
-        response = requests.get(url, headers=headers)
-        json_resp = response.json()
+        json_resp = self._get('/competitions/' + league_competitions[league_name], 'competition')
         current_matchday = json_resp['currentSeason']['currentMatchday']
         if current_matchday is None:
             return 1
         else:
             return current_matchday
 
-    def _convert_datetime_timezone_to_local(self, utc_dt_str):
-        dt_format = '%Y-%m-%dT%H:%M:%SZ'
-        utc_dt = datetime.strptime(utc_dt_str, dt_format)
-        return utc_dt.replace(tzinfo=timezone.utc).astimezone(tz=None)
-
-    def _get_date_from_datetime(self, local_dt, date_format='%A %d %B %Y'):
-        return datetime.strftime(local_dt, date_format)
-
-    def _get_time_from_datetime(self, local_dt, time_format='%H:%M'):
-        return datetime.strftime(local_dt, time_format)
+    def _format_match_times(self, matches, zone, **formats):
+        # utcDate -> (local date, local time) for the whole batch
+        return self.time_formatter.format_many([match['utcDate'] for match in matches], zone, **formats)
 
     def _normalize_team_name(self, team_name):
         team_name = str(team_name).replace('AFC', '')
         team_name = team_name.replace('FC', '')
         return team_name.strip()
 
-    def get_fixtures(self, league_name):
+    def get_fixtures(self, league_name, zone=None):
         matchday = self._get_current_matchday(league_name)
-        url = base_url + '/competitions/' + league_competitions[league_name] + '/matches'
-        params = {
-            'matchday': matchday
-        }
-        response = requests.get(url, params=params, headers=headers)
-        resp_json = response.json()
+        season = self.match_store.season(league_competitions[league_name])
+        matches = season.matchday(matchday)
         data = dict()
         data['match_day'] = matchday
-        data['competition_name'] = resp_json['competition']['name']
-        for match in resp_json['matches']:
-            localt_dt = self._convert_datetime_timezone_to_local(match['utcDate'])
-            date_str = self._get_date_from_datetime(localt_dt)
-            home_team = match['homeTeam']
-            home_team['name'] = self._normalize_team_name(home_team['name'])
-            away_team = match['awayTeam']
-            away_team['name'] = self._normalize_team_name(away_team['name'])
+        data['competition_name'] = season.competition_name
+        match_times = self._format_match_times(matches, zone)
+        for match in matches:
+            date_str, match_time = match_times[match['utcDate']]
+            # the indexed matches are shared, so normalized names go into copies
+            home_team = dict(match['homeTeam'], name=self._normalize_team_name(match['homeTeam']['name']))
+            away_team = dict(match['awayTeam'], name=self._normalize_team_name(match['awayTeam']['name']))
             if date_str not in data:
                 data[date_str] = [
                     {
                         'homeTeam': home_team,
                         'awayTeam': away_team,
-                        'match_time': self._get_time_from_datetime(localt_dt),
+                        'match_time': match_time,
                         'match_id': match['id']
                     }
                 ]
             else:
                 data[date_str].append(
                     {
-                        'homeTeam': match['homeTeam'],
-                        'awayTeam': match['awayTeam'],
-                        'match_time': self._get_time_from_datetime(localt_dt),
+                        'homeTeam': home_team,
+                        'awayTeam': away_team,
+                        'match_time': match_time,
                         'match_id': match['id']
                     }
                 )
@@ -104,15 +172,14 @@ class FootballApi(object):
         return 'N/A'
 
     def _get_emoji_flag(self, country):
-        for flag in emoji_flags:
-            if country.lower() in flag['name'].lower():
-                return flag['emoji']
-        return ''
+        global emoji_flag_index
+        if emoji_flag_index is None:
+            # built on the first squad request instead of at import time
+            emoji_flag_index = EmojiFlagIndex.from_file(emoji_flags_path)
+        return emoji_flag_index.get(country)
 
     def get_team(self, team_id):
-        url = base_url + '/teams/{0}'.format(team_id)
-        response = requests.get(url, headers=headers)
-        resp_json = response.json()
+        resp_json = self._get('/teams/{0}'.format(team_id), 'team')
         data = dict()
         data['team_name'] = resp_json['name']
         data['team_website'] = resp_json['website']
@@ -131,56 +198,47 @@ class FootballApi(object):
         data['players'] = sorted(data['players'], key=lambda k: k['position'])
         return data
 
-    def get_matches_by_team(self, team_id, limit):
-        url = base_url + '/teams/{0}/matches'.format(team_id)
-        response = requests.get(url, headers=headers)
-        resp_json = response.json()
+    def get_matches_by_team(self, team_id, limit, zone=None):
+        # cups and European games are not in the league indexes, so the team's own schedule is used
+        resp_json = self._get('/teams/{0}/matches'.format(team_id), 'matches')
+        scheduled = [match for match in resp_json['matches'] if match['status'] == 'SCHEDULED'][:limit]
         data = dict()
         data['matches'] = []
-        for match in resp_json['matches']:
-            if len(data['matches']) == limit:
-                break
-            if match['status'] == 'SCHEDULED':
-                local_dt = self._convert_datetime_timezone_to_local(match['utcDate'])
-                local_date = self._get_date_from_datetime(local_dt, date_format='%a, %b %d').upper()
-                local_time = self._get_time_from_datetime(local_dt)
-                if int(team_id) == match['homeTeam']['id']:
-                    data['team_name'] = match['homeTeam']['name']
-                    data['matches'].append(
-                        {
-                            'dt': '{0} {1}'.format(local_date, local_time),
-                            'opponent_team_name': '{0} (H)'.format(match['awayTeam']['name']),
-                            'opponent_team_id': match['awayTeam']['id']
-                        }
-                    )
-                else:
-                    data['matches'].append(
-                        {
-                            'dt': '{0} {1}'.format(local_date, local_time),
-                            'opponent_team_name': '{0} (A)'.format(match['homeTeam']['name']),
-                            'opponent_team_id': match['homeTeam']['id']
-                        }
-                    )
+        match_times = self._format_match_times(scheduled, zone, date_format='%a, %b %d')
+        for match in scheduled:
+            local_date, local_time = match_times[match['utcDate']]
+            local_date = local_date.upper()
+            if int(team_id) == match['homeTeam']['id']:
+                data['team_name'] = match['homeTeam']['name']
+                data['matches'].append(
+                    {
+                        'dt': '{0} {1}'.format(local_date, local_time),
+                        'opponent_team_name': '{0} (H)'.format(match['awayTeam']['name']),
+                        'opponent_team_id': match['awayTeam']['id']
+                    }
+                )
+            else:
+                data['matches'].append(
+                    {
+                        'dt': '{0} {1}'.format(local_date, local_time),
+                        'opponent_team_name': '{0} (A)'.format(match['homeTeam']['name']),
+                        'opponent_team_id': match['homeTeam']['id']
+                    }
+                )
         return data
     
-    def get_results(self, league_name, day_offset):
+    def get_results(self, league_name, day_offset, zone=None):
         current_matchday = self._get_current_matchday(league_name)
-        params = {
-            'matchday': current_matchday,
-            'status': 'FINISHED,LIVE,IN_PLAY'
-        }
-        url = base_url + '/competitions/' + league_competitions[league_name] + '/matches'
-        response = requests.get(url, headers=headers, params=params)
-        resp_json = response.json()
+        season = self.match_store.season(league_competitions[league_name])
+        matches = season.matchday(current_matchday, result_statuses)
         data = dict()
-        data['competition_name'] = resp_json['competition']['name']
-        for match in resp_json['matches']:
-            localt_dt = self._convert_datetime_timezone_to_local(match['utcDate'])
-            date_str = self._get_date_from_datetime(localt_dt)
-            home_team = match['homeTeam']
-            home_team['name'] = self._normalize_team_name(home_team['name'])
-            away_team = match['awayTeam']
-            away_team['name'] = self._normalize_team_name(away_team['name'])
+        data['competition_name'] = season.competition_name
+        match_times = self._format_match_times(matches, zone)
+        for match in matches:
+            date_str = match_times[match['utcDate']][0]
+            # the indexed matches are shared, so normalized names go into copies
+            home_team = dict(match['homeTeam'], name=self._normalize_team_name(match['homeTeam']['name']))
+            away_team = dict(match['awayTeam'], name=self._normalize_team_name(match['awayTeam']['name']))
             if date_str not in data:
                 data[date_str] = [
                     {
@@ -195,8 +253,8 @@ class FootballApi(object):
             else:
                 data[date_str].append(
                     {
-                        'homeTeam': match['homeTeam'],
-                        'awayTeam': match['awayTeam'],
+                        'homeTeam': home_team,
+                        'awayTeam': away_team,
                         'match_id': match['id'],
                         'status': match_status[match['status']],
                         'score': '{0} - {1}'.format(match['score']['fullTime']['homeTeam'], 
@@ -206,10 +264,17 @@ class FootballApi(object):
 
         return data
 
+    def get_live_matches(self, competition_id):
+        params = {
+            'status': live_statuses
+        }
+        return self._get('/competitions/{0}/matches'.format(competition_id), 'live', params)['matches']
+
+    def get_match(self, match_id):
+        return self._get('/matches/{0}'.format(match_id), 'live')['match']
+
     def get_standings(self, league_name):
-        url = base_url + '/competitions/' + league_competitions[league_name] + '/standings'
-        response = requests.get(url, headers=headers)
-        resp_json = response.json()
+        resp_json = self._get('/competitions/' + league_competitions[league_name] + '/standings', 'standings')
         data = dict()
         data['competition_name'] = resp_json['competition']['name']
         data['teams'] = []
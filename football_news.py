@@ -1,16 +1,21 @@
-import time
+from datetime import datetime
 
 from linebot.models import (
     BubbleContainer
 )
 
+from match_time import DEFAULT_TIME_ZONE, get_zone
+
 DATE_FORMAT = '%d %b %Y %H:%M:%S'
 
 
 class FootballNews(object):
 
+    def __init__(self, zone=DEFAULT_TIME_ZONE):
+        self.zone = get_zone(zone)
+
     def _convert_epoch_to_str(self, epoch):
-        return time.strftime(DATE_FORMAT, time.localtime(epoch))
+        return datetime.fromtimestamp(epoch, self.zone).strftime(DATE_FORMAT)
 
     def get_news_bubble(self, header_bg_color, data, header_text_color="#ffffff"):
         bubble = {
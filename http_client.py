@@ -0,0 +1,89 @@
+import os
+from time import perf_counter
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+from linebot.http_client import HttpClient, RequestsHttpResponse
+
+import metrics
+
+POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))
+POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '20'))
+CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '2'))
+BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', '0.3'))
+
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+RETRY_STATUSES = (500, 502, 503, 504)
+
+upstream_seconds = metrics.registry.histogram('upstream_request_seconds',
+                                              'Latency of outbound HTTP requests by host.', ('upstream',))
+upstream_errors = metrics.registry.counter('upstream_errors_total',
+                                           'Outbound HTTP requests that timed out, failed or got 429/5xx, by host.',
+                                           ('upstream', 'kind'))
+
+
+def mount_pools(session, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=MAX_RETRIES):
+    # only idempotent methods are retried, so a LINE reply is never sent twice
+    retry = Retry(total=max_retries, backoff_factor=BACKOFF_FACTOR, status_forcelist=RETRY_STATUSES,
+                  raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['Accept-Encoding'] = 'gzip, deflate'
+    return session
+
+
+class PooledSession(requests.Session):
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, **pool_options):
+        super(PooledSession, self).__init__()
+        self.timeout = timeout
+        mount_pools(self, **pool_options)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        upstream = urlsplit(url).hostname
+        started = perf_counter()
+        try:
+            response = super(PooledSession, self).request(method, url, **kwargs)
+        except requests.Timeout:
+            upstream_errors.inc(upstream, 'timeout')
+            raise
+        except requests.RequestException:
+            upstream_errors.inc(upstream, 'connection')
+            raise
+        finally:
+            upstream_seconds.observe(perf_counter() - started, upstream)
+        if response.status_code == 429:
+            upstream_errors.inc(upstream, 'throttled')
+        elif response.status_code >= 500:
+            upstream_errors.inc(upstream, 'server_error')
+        return response
+
+
+session = PooledSession()
+
+
+class PooledLineHttpClient(HttpClient):
+
+    def get(self, url, headers=None, params=None, stream=False, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+        response = session.get(url, headers=headers, params=params, stream=stream, timeout=timeout)
+        return RequestsHttpResponse(response)
+
+    def post(self, url, headers=None, data=None, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+        response = session.post(url, headers=headers, data=data, timeout=timeout)
+        return RequestsHttpResponse(response)
+
+    def delete(self, url, headers=None, data=None, timeout=None):
+        if timeout is None:
+            timeout = self.timeout
+        response = session.delete(url, headers=headers, data=data, timeout=timeout)
+        return RequestsHttpResponse(response)
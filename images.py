@@ -0,0 +1,195 @@
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from io import BytesIO
+from time import time
+
+import requests
+
+import http_client
+
+IMAGE_CHECK_TTL = int(os.getenv('IMAGE_CHECK_TTL', str(6 * 60 * 60)))
+# failed checks are retried sooner, they are often a timeout rather than a broken link
+IMAGE_CHECK_FAILURE_TTL = 5 * 60
+IMAGE_CHECK_MAX_ENTRIES = 4096
+
+# public https base of this app, e.g. https://football-bot.herokuapp.com; unset serves the originals
+IMAGE_PROXY_URL = os.getenv('IMAGE_PROXY_URL')
+IMAGE_CACHE_PATH = os.getenv('IMAGE_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'football-bot-images.db'))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+THUMBNAIL_TTL = 7 * 24 * 60 * 60
+# news bubbles show the image at 4:3 in the "md" size
+THUMBNAIL_SIZE = (400, 300)
+THUMBNAIL_QUALITY = 80
+MAX_SOURCE_BYTES = 10 * 1024 * 1024
+PREPARE_WORKERS = 8
+
+DIGEST_PATTERN = re.compile(r'^[0-9a-f]{40}$')
+
+
+def https_url(image_url):
+    # LINE only loads https images
+    if image_url and image_url.startswith('http:'):
+        return 'https:' + image_url[len('http:'):]
+    return image_url
+
+
+def image_digest(image_url):
+    return hashlib.sha1(image_url.encode('utf-8')).hexdigest()
+
+
+def make_thumbnail(content, size=THUMBNAIL_SIZE, quality=THUMBNAIL_QUALITY):
+    # Pillow is only needed when the proxy is enabled
+    from PIL import Image, ImageOps
+    image = Image.open(BytesIO(content))
+    # lets the JPEG decoder scale down while decoding instead of expanding the full original
+    image.draft('RGB', (size[0] * 2, size[1] * 2))
+    image = ImageOps.fit(image.convert('RGB'), size, Image.LANCZOS)
+    output = BytesIO()
+    image.save(output, 'JPEG', quality=quality, optimize=True, progressive=True)
+    return output.getvalue()
+
+
+class ImageValidator(object):
+
+    def __init__(self, ttl=IMAGE_CHECK_TTL, failure_ttl=IMAGE_CHECK_FAILURE_TTL, max_entries=IMAGE_CHECK_MAX_ENTRIES):
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalid = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def check(self, image_url):
+        with self._lock:
+            entry = self._entries.get(image_url)
+            if entry is not None and entry[1] >= time():
+                self._entries.move_to_end(image_url)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        valid = self._head(image_url)
+        with self._lock:
+            self._entries[image_url] = (valid, time() + (self.ttl if valid else self.failure_ttl))
+            self._entries.move_to_end(image_url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            if not valid:
+                self.invalid += 1
+        return valid
+
+    def _head(self, image_url):
+        if not image_url or not image_url.startswith('https://'):
+            return False
+        try:
+            response = http_client.session.head(image_url, allow_redirects=True)
+            if response.status_code == 405:
+                # some image hosts refuse HEAD
+                response = http_client.session.get(image_url, stream=True)
+                response.close()
+        except requests.RequestException as e:
+            print('image check failed for {0}: {1!r}'.format(image_url, e))
+            return False
+        return response.status_code == 200 and response.headers.get('Content-Type', '').startswith('image/')
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': float(self.hits) / lookups if lookups else 0.0,
+                'invalid': self.invalid,
+                'entries': len(self._entries)
+            }
+
+
+class ImageProxy(object):
+
+    def __init__(self, default_url, base_url=None, store=None, validator=None):
+        self.default_url = default_url
+        self.validator = validator if validator is not None else ImageValidator()
+        self.store = store
+        self.base_url = None
+        if base_url and store is not None:
+            if find_spec('PIL') is None:
+                print('Pillow is not installed, serving original news images')
+            else:
+                self.base_url = base_url.rstrip('/')
+        self.rendered = 0
+        self.served = 0
+        self._executor = ThreadPoolExecutor(max_workers=PREPARE_WORKERS)
+
+    def prepare(self, image_url):
+        image_url = https_url(image_url)
+        if not self.validator.check(image_url):
+            return self.default_url
+        if self.base_url is None:
+            return image_url
+        digest = image_digest(image_url)
+        if self.store.get('thumb:' + digest) is None:
+            try:
+                self._render(digest, image_url)
+            except Exception as e:
+                print('thumbnail failed for {0}: {1!r}'.format(image_url, e))
+                return image_url
+        return '{0}/img/{1}'.format(self.base_url, digest)
+
+    def prepare_entries(self, data):
+        # validates and renders the images of one feed snapshot in parallel
+        urls = list(self._executor.map(self.prepare, [entry['image_url'] for entry in data['entries']]))
+        for entry, image_url in zip(data['entries'], urls):
+            entry['image_url'] = image_url
+        return data
+
+    def get(self, digest):
+        if self.store is None or not DIGEST_PATTERN.match(digest):
+            return None
+        stored = self.store.get('thumb:' + digest)
+        if stored is None:
+            # evicted from the bounded cache: render again from the remembered source
+            source = self.store.get('src:' + digest)
+            if source is None:
+                return None
+            try:
+                content = self._render(digest, source[0].decode('utf-8'))
+            except Exception as e:
+                print('thumbnail failed for {0}: {1!r}'.format(digest, e))
+                return None
+        else:
+            content = stored[0]
+        self.served += 1
+        return content
+
+    def _render(self, digest, image_url):
+        response = http_client.session.get(image_url, stream=True)
+        response.raise_for_status()
+        chunks = []
+        size = 0
+        for chunk in response.iter_content(64 * 1024):
+            size += len(chunk)
+            if size > MAX_SOURCE_BYTES:
+                response.close()
+                raise ValueError('image larger than {0} bytes'.format(MAX_SOURCE_BYTES))
+            chunks.append(chunk)
+        thumbnail = make_thumbnail(b''.join(chunks))
+        expires_at = time() + THUMBNAIL_TTL
+        # the source outlives its thumbnail so an evicted thumbnail can be rendered again
+        self.store.set('src:' + digest, image_url.encode('utf-8'), expires_at + THUMBNAIL_TTL)
+        self.store.set('thumb:' + digest, thumbnail, expires_at)
+        self.rendered += 1
+        return thumbnail
+
+    def stats(self):
+        stats = self.validator.stats()
+        stats['rendered'] = self.rendered
+        stats['served'] = self.served
+        stats['proxy'] = self.base_url is not None
+        return stats
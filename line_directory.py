@@ -0,0 +1,99 @@
+import threading
+from time import time
+
+import http_client
+
+RICH_MENU_REFRESH_INTERVAL = 60 * 60
+LIFF_APPS_URL = 'https://api.line.me/liff/v1/apps'
+LIFF_TTL = 60 * 60
+
+
+class _Directory(object):
+
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self.loads = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def load(self):
+        raise NotImplementedError
+
+    def start(self):
+        thread = threading.Thread(target=self._refresh_loop, name=self.__class__.__name__)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _refresh_loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.load()
+            except Exception as e:
+                print('{0} refresh failed: {1!r}'.format(self.__class__.__name__, e))
+            self._stop_event.wait(self.refresh_interval)
+
+
+class RichMenuDirectory(_Directory):
+
+    def __init__(self, line_bot_api, refresh_interval=RICH_MENU_REFRESH_INTERVAL):
+        super(RichMenuDirectory, self).__init__(refresh_interval)
+        self.line_bot_api = line_bot_api
+        self._menus = None
+
+    def load(self):
+        menus = dict()
+        for rich_menu in self.line_bot_api.get_rich_menu_list():
+            menus[rich_menu.chat_bar_text] = rich_menu.rich_menu_id
+        with self._lock:
+            self._menus = menus
+            self.loads += 1
+        return menus
+
+    def get(self, chat_bar_text):
+        with self._lock:
+            menus = self._menus
+        if menus is None:
+            menus = self.load()
+        return menus.get(chat_bar_text)
+
+
+class LiffDirectory(_Directory):
+
+    def __init__(self, channel_access_token, endpoints, ttl=LIFF_TTL):
+        # refresh in the background well before entries expire
+        super(LiffDirectory, self).__init__(ttl / 2.0)
+        self.channel_access_token = channel_access_token
+        self.endpoints = list(endpoints)
+        self.ttl = ttl
+        self._apps = None
+        self._expires_at = 0
+
+    def load(self):
+        headers = {
+            'Authorization': 'Bearer {}'.format(self.channel_access_token)
+        }
+        response = http_client.session.get(LIFF_APPS_URL, headers=headers)
+        apps = dict()
+        for app in response.json()['apps']:
+            for endpoint in self.endpoints:
+                if endpoint not in apps and endpoint in app['view']['url']:
+                    apps[endpoint] = 'line://app/{}'.format(app['liffId'])
+        with self._lock:
+            self._apps = apps
+            self._expires_at = time() + self.ttl
+            self.loads += 1
+        return apps
+
+    def get(self, endpoint):
+        with self._lock:
+            apps = self._apps
+            expired = self._expires_at < time()
+            if endpoint not in self.endpoints:
+                self.endpoints.append(endpoint)
+                expired = True
+        if apps is None or expired:
+            apps = self.load()
+        return apps.get(endpoint, '')
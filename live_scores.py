@@ -0,0 +1,169 @@
+import calendar
+import os
+import threading
+from datetime import datetime, timedelta
+from time import strptime, time
+
+GOAL = 'goal'
+HALF_TIME = 'half_time'
+FULL_TIME = 'full_time'
+
+LIVE_POLL_INTERVAL = float(os.getenv('LIVE_POLL_INTERVAL', '60'))
+IDLE_POLL_INTERVAL = 5 * 60
+# share of the football-data.org budget the engine may spend, the rest is left for replies
+LIVE_RATE_PER_MINUTE = float(os.getenv('LIVE_RATE_PER_MINUTE', '5'))
+# a competition is polled from shortly before a kickoff until the match must be over
+KICKOFF_LEAD = 5 * 60
+MATCH_WINDOW = 3 * 60 * 60
+PLAYING = ('IN_PLAY', 'PAUSED')
+
+
+def _kickoff(match):
+    return calendar.timegm(strptime(match['utcDate'], '%Y-%m-%dT%H:%M:%SZ'))
+
+
+def _score(match):
+    full_time = match['score']['fullTime']
+    return full_time['homeTeam'] or 0, full_time['awayTeam'] or 0
+
+
+class LiveScoreEngine(object):
+
+    def __init__(self, football_api, competitions, notify, poll_interval=LIVE_POLL_INTERVAL,
+                 idle_interval=IDLE_POLL_INTERVAL, rate_per_minute=LIVE_RATE_PER_MINUTE, elect=None):
+        # notify(event, competition_id, match) is called once per change, whatever the subscriber count
+        # elect(ttl) is true while this process is the one worker allowed to poll; None always polls
+        self.football_api = football_api
+        self.competitions = list(competitions)
+        self.notify = notify
+        self.poll_interval = poll_interval
+        self.idle_interval = idle_interval
+        self.rate_per_minute = rate_per_minute
+        self.elect = elect
+        self.leader = elect is None
+        self.polls = 0
+        self.alerts = 0
+        # football-data requests made by the engine, schedule loads included
+        self.calls = 0
+        # match id: (competition id, status, (home goals, away goals)) as of the last poll
+        self._snapshots = dict()
+        self._stop_event = threading.Event()
+
+    def active_competitions(self, now=None):
+        now = now if now is not None else time()
+        active = set(snapshot[0] for snapshot in self._snapshots.values())
+        today = datetime.utcfromtimestamp(now).date()
+        days = [(today + timedelta(days=offset)).isoformat() for offset in (-1, 0, 1)]
+        for competition_id in self.competitions:
+            if competition_id in active:
+                continue
+            # kickoff times rarely move, so the schedule is not refreshed here; a missing one costs a request
+            season = self.football_api.match_store.peek(competition_id)
+            if season is None:
+                self.calls += 1
+                season = self.football_api.match_store.season(competition_id)
+            for day in days:
+                if any(now - MATCH_WINDOW <= _kickoff(match) <= now + KICKOFF_LEAD
+                       for match in season.by_date.get(day, ())):
+                    active.add(competition_id)
+                    break
+        return active
+
+    def next_interval(self, active, calls=None):
+        # the cycle is stretched so every request it made stays within the engine's share
+        calls = len(active) if calls is None else calls
+        interval = self.poll_interval if active else self.idle_interval
+        return max(interval, calls * 60.0 / self.rate_per_minute)
+
+    def poll(self, competition_id):
+        self.polls += 1
+        self.calls += 1
+        live = dict((match['id'], match) for match in self.football_api.get_live_matches(competition_id))
+        events = []
+        for match in live.values():
+            events.extend(self._diff(competition_id, match))
+        # matches that left IN_PLAY/PAUSED are looked up once for their final state
+        gone = [match_id for match_id, snapshot in self._snapshots.items()
+                if snapshot[0] == competition_id and match_id not in live]
+        for match_id in gone:
+            self.calls += 1
+            match = self.football_api.get_match(match_id)
+            events.extend(self._diff(competition_id, match))
+            if match['status'] not in PLAYING:
+                del self._snapshots[match_id]
+        return events
+
+    def _diff(self, competition_id, match):
+        previous = self._snapshots.get(match['id'])
+        status = match['status']
+        score = _score(match)
+        self._snapshots[match['id']] = (competition_id, status, score)
+        if previous is None:
+            # first sighting only sets the baseline, so a restart does not replay old goals
+            return []
+        events = []
+        if sum(score) > sum(previous[2]):
+            events.append((GOAL, competition_id, match))
+        if status == 'PAUSED' and previous[1] == 'IN_PLAY':
+            events.append((HALF_TIME, competition_id, match))
+        if status == 'FINISHED' and previous[1] != 'FINISHED':
+            events.append((FULL_TIME, competition_id, match))
+        return events
+
+    def _dispatch(self, events):
+        for event, competition_id, match in events:
+            try:
+                self.notify(event, competition_id, match)
+                self.alerts += 1
+            except Exception as e:
+                print('live scores: notify {0} for match {1} failed: {2!r}'.format(event, match['id'], e))
+
+    def start(self):
+        thread = threading.Thread(target=self._run, name='live-scores')
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _is_leader(self, ttl):
+        try:
+            leader = self.elect(ttl)
+        except Exception as e:
+            print('live scores: leader election failed: {0!r}'.format(e))
+            leader = False
+        if not leader:
+            # baselines are taken again on becoming leader, so alerts sent meanwhile are not repeated
+            self._snapshots.clear()
+        self.leader = leader
+        return leader
+
+    def _run(self):
+        interval = self.idle_interval
+        while not self._stop_event.is_set():
+            # the lease outlives the longest wait between two renewals
+            if self.elect is not None and not self._is_leader(2 * max(interval, self.idle_interval)):
+                self._stop_event.wait(self.poll_interval)
+                continue
+            calls = self.calls
+            active = set()
+            try:
+                active = self.active_competitions()
+            except Exception as e:
+                print('live scores: schedule lookup failed: {0!r}'.format(e))
+            for competition_id in sorted(active):
+                try:
+                    self._dispatch(self.poll(competition_id))
+                except Exception as e:
+                    print('live scores: poll of {0} failed: {1!r}'.format(competition_id, e))
+            interval = self.next_interval(active, self.calls - calls)
+            self._stop_event.wait(interval)
+
+    def stats(self):
+        return {
+            'leader': self.leader,
+            'tracked_matches': len(self._snapshots),
+            'polls': self.polls,
+            'calls': self.calls,
+            'alerts': self.alerts
+        }
@@ -0,0 +1,125 @@
+import threading
+from datetime import datetime, timedelta
+from time import time
+
+MATCH_REFRESH_INTERVAL = 60
+SEASON_RELOAD_INTERVAL = 6 * 60 * 60
+# incremental refreshes re-fetch this many days either side of today
+REFRESH_WINDOW_DAYS = 3
+# only the fields the views read are kept for a whole season
+MATCH_FIELDS = ('id', 'utcDate', 'status', 'matchday', 'lastUpdated')
+SCORE_FIELDS = ('fullTime', 'halfTime')
+
+
+def _compact_team(team):
+    return {'id': team['id'], 'name': team['name']}
+
+
+def compact_match(match):
+    compact = dict((field, match.get(field)) for field in MATCH_FIELDS)
+    compact['homeTeam'] = _compact_team(match['homeTeam'])
+    compact['awayTeam'] = _compact_team(match['awayTeam'])
+    score = match.get('score') or {}
+    compact['score'] = dict((field, dict(score.get(field) or {})) for field in SCORE_FIELDS)
+    return compact
+
+
+class SeasonIndex(object):
+    # immutable once built: refreshes build a new index and swap it in
+
+    def __init__(self, competition_name, matches):
+        self.competition_name = competition_name
+        self.matches = matches
+        self.by_matchday = dict()
+        self.by_date = dict()
+        for match in sorted(matches.values(), key=lambda m: (m['utcDate'], m['id'])):
+            self.by_matchday.setdefault(match['matchday'], []).append(match)
+            self.by_date.setdefault(match['utcDate'][:10], []).append(match)
+
+    @classmethod
+    def from_response(cls, resp_json):
+        matches = dict((match['id'], compact_match(match)) for match in resp_json['matches'])
+        return cls(resp_json['competition']['name'], matches)
+
+    def merged(self, updates):
+        matches = dict(self.matches)
+        for match in updates:
+            matches[match['id']] = compact_match(match)
+        return SeasonIndex(self.competition_name, matches)
+
+    def matchday(self, matchday, statuses=None):
+        matches = self.by_matchday.get(matchday, [])
+        if statuses is None:
+            return list(matches)
+        return [match for match in matches if match['status'] in statuses]
+
+
+class MatchStore(object):
+
+    def __init__(self, fetch, refresh_interval=MATCH_REFRESH_INTERVAL, reload_interval=SEASON_RELOAD_INTERVAL):
+        # fetch(path, endpoint, params) returns the decoded football-data response
+        self.fetch = fetch
+        self.refresh_interval = refresh_interval
+        self.reload_interval = reload_interval
+        self.loads = 0
+        self.refreshes = 0
+        self._seasons = dict()
+        self._lock = threading.Lock()
+
+    def _path(self, competition_id):
+        return '/competitions/{0}/matches'.format(competition_id)
+
+    def load(self, competition_id):
+        index = SeasonIndex.from_response(self.fetch(self._path(competition_id), 'matches', None))
+        now = time()
+        with self._lock:
+            self._seasons[competition_id] = (index, now, now)
+            self.loads += 1
+        return index
+
+    def refresh(self, competition_id):
+        today = datetime.utcnow().date()
+        params = {
+            'dateFrom': (today - timedelta(days=REFRESH_WINDOW_DAYS)).isoformat(),
+            'dateTo': (today + timedelta(days=REFRESH_WINDOW_DAYS)).isoformat()
+        }
+        resp_json = self.fetch(self._path(competition_id), 'matches', params)
+        with self._lock:
+            index, loaded_at, refreshed_at = self._seasons[competition_id]
+            index = index.merged(resp_json['matches'])
+            self._seasons[competition_id] = (index, loaded_at, time())
+            self.refreshes += 1
+        return index
+
+    def season(self, competition_id):
+        with self._lock:
+            entry = self._seasons.get(competition_id)
+        now = time()
+        if entry is None or now - entry[1] > self.reload_interval:
+            return self.load(competition_id)
+        index, loaded_at, refreshed_at = entry
+        if now - refreshed_at > self.refresh_interval:
+            try:
+                return self.refresh(competition_id)
+            except Exception as e:
+                # a slightly old index beats failing the reply
+                print('match store: refresh of {0} failed: {1!r}'.format(competition_id, e))
+        return index
+
+    def peek(self, competition_id):
+        # the loaded index as it is, without calling football-data; None until loaded or once due for a reload
+        with self._lock:
+            entry = self._seasons.get(competition_id)
+        if entry is None or time() - entry[1] > self.reload_interval:
+            return None
+        return entry[0]
+
+    def stats(self):
+        with self._lock:
+            seasons = [entry[0] for entry in self._seasons.values()]
+            return {
+                'competitions': len(seasons),
+                'matches': sum(len(index.matches) for index in seasons),
+                'loads': self.loads,
+                'refreshes': self.refreshes
+            }
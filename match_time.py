@@ -0,0 +1,108 @@
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from time import time
+
+import pytz
+
+DEFAULT_TIME_ZONE = os.getenv('DEFAULT_TIME_ZONE', 'Asia/Bangkok')
+UTC_DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+DATE_FORMAT = '%A %d %B %Y'
+TIME_FORMAT = '%H:%M'
+DEFAULT_MAX_ENTRIES = 4096
+# a zone read from the chat store is reused this long before it is read again
+CHAT_ZONE_REFRESH = 60
+
+
+def get_zone(name):
+    # raises pytz.UnknownTimeZoneError for names outside the IANA database
+    return pytz.timezone(name)
+
+
+class MatchTimeFormatter(object):
+
+    def __init__(self, default_zone=DEFAULT_TIME_ZONE, max_entries=DEFAULT_MAX_ENTRIES):
+        self.default_zone = get_zone(default_zone).zone
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def format_many(self, utc_dates, zone=None, date_format=DATE_FORMAT, time_format=TIME_FORMAT):
+        # a matchday shares a handful of kickoff times, so each distinct timestamp is parsed once
+        tz = get_zone(zone or self.default_zone)
+        formatted = dict()
+        missing = []
+        with self._lock:
+            for utc_date in set(utc_dates):
+                cache_key = (utc_date, tz.zone, date_format, time_format)
+                entry = self._entries.get(cache_key)
+                if entry is None:
+                    missing.append(utc_date)
+                    continue
+                self._entries.move_to_end(cache_key)
+                formatted[utc_date] = entry
+            self.hits += len(formatted)
+            self.misses += len(missing)
+        if not missing:
+            return formatted
+        fresh = dict()
+        for utc_date in missing:
+            local_dt = pytz.utc.localize(datetime.strptime(utc_date, UTC_DATE_FORMAT)).astimezone(tz)
+            fresh[utc_date] = (local_dt.strftime(date_format), local_dt.strftime(time_format))
+        with self._lock:
+            for utc_date, entry in fresh.items():
+                self._entries[(utc_date, tz.zone, date_format, time_format)] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        formatted.update(fresh)
+        return formatted
+
+    def format(self, utc_date, zone=None, date_format=DATE_FORMAT, time_format=TIME_FORMAT):
+        return self.format_many([utc_date], zone, date_format, time_format)[utc_date]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': float(self.hits) / lookups if lookups else 0.0,
+                'entries': len(self._entries)
+            }
+
+
+class ChatTimeZones(object):
+
+    def __init__(self, default_zone=DEFAULT_TIME_ZONE, store=None, refresh=CHAT_ZONE_REFRESH):
+        # store is a ChatStore shared by every worker; without one zones live in this process
+        self.default_zone = get_zone(default_zone).zone
+        self.store = store
+        self.refresh = refresh
+        # chat id: (zone or None, read at)
+        self._zones = dict()
+        self._lock = threading.Lock()
+
+    def get(self, chat_id):
+        if chat_id is None:
+            return self.default_zone
+        with self._lock:
+            entry = self._zones.get(chat_id)
+        if self.store is not None and (entry is None or entry[1] + self.refresh < time()):
+            # set by another worker or before a restart
+            entry = (self.store.get_time_zone(chat_id), time())
+            with self._lock:
+                self._zones[chat_id] = entry
+        if entry is None or entry[0] is None:
+            return self.default_zone
+        return entry[0]
+
+    def set(self, chat_id, zone):
+        zone = get_zone(zone).zone
+        if self.store is not None:
+            self.store.set_time_zone(chat_id, zone)
+        with self._lock:
+            self._zones[chat_id] = (zone, time())
+        return zone
@@ -0,0 +1,181 @@
+import re
+import threading
+from bisect import bisect_left
+from functools import wraps
+from time import perf_counter
+
+# seconds, from a cache hit up to a slow upstream
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+INVALID_NAME_CHARS = re.compile(r'[^a-zA-Z0-9_]')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra is not None:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join('{0}="{1}"'.format(name, _escape(value)) for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(value)
+
+
+def _flatten(prefix, stats):
+    for key, value in stats.items():
+        name = INVALID_NAME_CHARS.sub('_', '{0}_{1}'.format(prefix, key))
+        if isinstance(value, dict):
+            for item in _flatten(name, value):
+                yield item
+        elif isinstance(value, (bool, int, float)):
+            yield name, float(value)
+
+
+class Counter(object):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = dict()
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + 1
+
+    def collect(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            yield '{0}{1} {2}'.format(self.name, _format_labels(self.label_names, label_values), value)
+
+
+class _Timer(object):
+
+    def __init__(self, histogram, label_values):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.histogram.observe(perf_counter() - self.started, *self.label_values)
+
+
+class Histogram(object):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # label values: [per-bucket counts with a final +Inf slot, sum]
+        self._series = dict()
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        # cumulative bucket counts are only built at scrape time
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, *label_values):
+        return _Timer(self, label_values)
+
+    def collect(self):
+        with self._lock:
+            items = sorted((label_values, list(counts), total)
+                           for label_values, (counts, total) in self._series.items())
+        bounds = self.buckets + (float('inf'),)
+        for label_values, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield '{0}_bucket{1} {2}'.format(
+                    self.name, _format_labels(self.label_names, label_values, ('le', _format_value(bound))), cumulative)
+            labels = _format_labels(self.label_names, label_values)
+            yield '{0}_sum{1} {2}'.format(self.name, labels, _format_value(total))
+            yield '{0}_count{1} {2}'.format(self.name, labels, cumulative)
+
+
+class Registry(object):
+
+    def __init__(self):
+        self._metrics = []
+        self._stats = []
+
+    def counter(self, name, documentation, label_names=()):
+        metric = Counter(name, documentation, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, documentation, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_stats(self, prefix, documentation, stats, counters=()):
+        # stats() of the caches and queues is read only when /metrics is scraped;
+        # counters are the keys (nested keys joined by _) that only ever grow, the rest are gauges
+        counter_names = frozenset(INVALID_NAME_CHARS.sub('_', '{0}_{1}'.format(prefix, key)) for key in counters)
+        self._stats.append((prefix, documentation, stats, counter_names))
+
+    def expose(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append('# HELP {0} {1}'.format(metric.name, metric.documentation))
+            lines.append('# TYPE {0} {1}'.format(metric.name, metric.kind))
+            lines.extend(metric.collect())
+        for prefix, documentation, stats, counter_names in self._stats:
+            try:
+                values = sorted(_flatten(prefix, stats()))
+            except Exception as e:
+                print('metrics: {0} stats failed: {1!r}'.format(prefix, e))
+                continue
+            for name, value in values:
+                kind = 'gauge'
+                if name in counter_names:
+                    name, kind = name + '_total', 'counter'
+                lines.append('# HELP {0} {1}'.format(name, documentation))
+                lines.append('# TYPE {0} {1}'.format(name, kind))
+                lines.append('{0} {1}'.format(name, _format_value(value)))
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def instrument(histogram, errors):
+    # times a function under its own name and counts the exceptions it raises
+    def decorator(func):
+        name = func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                errors.inc(name)
+                raise
+            finally:
+                histogram.observe(perf_counter() - started, name)
+        return wrapper
+    return decorator
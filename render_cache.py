@@ -0,0 +1,50 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+def data_fingerprint(data):
+    serialized = json.dumps(data, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(serialized.encode('utf-8')).hexdigest()
+
+
+class RenderCache(object):
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, view, key, data, render):
+        # one entry per (view, key): a new fingerprint replaces the stale payload
+        cache_key = (view, str(key))
+        fingerprint = data_fingerprint(data)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        payload = render(data)
+        with self._lock:
+            self._entries[cache_key] = (fingerprint, payload)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return payload
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': float(self.hits) / lookups if lookups else 0.0,
+                'entries': len(self._entries)
+            }
@@ -1,16 +1,20 @@
-import feedparser
-from datetime import datetime, timedelta
-from time import mktime, time
-from bs4 import BeautifulSoup
-from requests_xml import XMLSession
+import calendar
+import heapq
+from time import time
 import os
 import ssl
 import json
 import re
+import threading
 import uuid
-import requests
-import html2text
-import dateparser
+import xml.etree.ElementTree as ElementTree
+from io import BytesIO
+
+import feed_stream
+import http_client
+from convert_time import convert_local_str_to_epoch, convert_time_str_to_epoch, rfc822_to_epoch
+from images import https_url
+from thai_date import THAI_TIMEZONE, parse_thai_date, thai_today
 
 BBC_RSS_FEED = 'http://feeds.bbci.co.uk/sport/football/rss.xml'
 UK_DATE_FORMAT = '%a, %d %b %Y %H:%M:%S %Z'
@@ -25,6 +29,7 @@ SHOT_ON_GOAL_RSS_FEED = 'https://www.shotongoal.com/feed/'
 SOCCER_SUCK_API = 'http://www.soccersuck.com/api'
 SOCCER_SUCK_TOPIC = 'http://www.soccersuck.com/boards/topic'
 SOCCER_SUCK_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+SOCCER_SUCK_TOKEN_TTL = int(os.getenv('SOCCER_SUCK_TOKEN_TTL', '1800'))
 
 DAILY_MAIL_RSS_FEED = 'http://www.dailymail.co.uk/sport/football/index.rss'
 
@@ -33,206 +38,373 @@ ARSENAL_RSS_FEED = 'https://www.90min.com/teams/arsenal.rss'
 LIVERPOOL_RSS_FEED = 'https://www.liverpoolfc.com/news.rss'
 CHELSEA_RSS_FEED = 'https://www.90min.com/teams/chelsea.rss'
 MANCITY_RSS_FEED = 'https://www.90min.com/teams/manchester-city.rss'
+DEFAULT_NEWS_IMAGE_URL = 'https://www.dwsports.com/on/demandware.static/-/' \
+                         'Sites-DWS-Master-Catalog/default/dw88d7b256/products/0650288_01.jpeg'
+
+STREAM_PARSE = os.getenv('RSS_STREAM_PARSE', 'on') != 'off'
+
+GOAL_IMAGE_URL = 'https://upload.wikimedia.org/wikipedia/commons/f/f1/Goal-com-logo-eps-vector-image.png'
+MIRROR_IMAGE_URL = 'https://logos-download.com/wp-content/uploads/2016/06/The_Daily_Mirror_logo_red_background.png'
+
+# feed_link: 'image' reads feed.image.link, 'link' reads feed.link
+# feed_date: 'updated' uses feed.updated_parsed, 'now' stamps the fetch time
+# image: path into the entry, e.g. ('media_thumbnail', 0, 'url') is entry['media_thumbnail'][0]['url']
+# sort: 'desc' / 'asc' picks the newest `limit` entries, None keeps the first `limit` in feed order
+# newest_first: the feed lists its newest items first, so parsing can stop after `limit` items
+FEED_SOURCES = {
+    'bbc': {
+        'url': BBC_RSS_FEED,
+        'feed_link': 'image',
+        'feed_date': 'updated',
+        'date_field': 'published_parsed',
+        'image': ('media_thumbnail', 0, 'url'),
+        'https_image': True,
+        'sort': 'desc',
+        'newest_first': True
+    },
+    'skysports': {
+        'url': SKY_SPORTS_RSS_FEED,
+        'feed_link': 'image',
+        'feed_date': 'updated',
+        'date_field': 'published_parsed',
+        'image': ('links', 1, 'href'),
+        'https_image': True,
+        'sort': 'desc'
+    },
+    'dailymail': {
+        'url': DAILY_MAIL_RSS_FEED,
+        'feed_link': 'image',
+        'feed_date': 'updated',
+        'date_field': 'published_parsed',
+        'image': ('links', 1, 'href'),
+        'https_image': True,
+        'sort': 'desc'
+    },
+    'goal': {
+        'url': GOAL_RSS_FEED,
+        'feed_link': 'link',
+        'feed_date': 'updated',
+        'date_field': 'updated_parsed',
+        'image_url': GOAL_IMAGE_URL,
+        'sort': 'asc',
+        'newest_first': True
+    },
+    'guardian': {
+        'url': GUARDIAN_RSS_FEED,
+        'feed_link': 'link',
+        'feed_date': 'updated',
+        'date_field': 'updated_parsed',
+        'image': ('media_content', 1, 'url'),
+        'sort': 'asc',
+        'newest_first': True
+    },
+    'mirror': {
+        'url': MIRROR_RSS_FEED,
+        'feed_link': 'link',
+        'feed_date': 'updated',
+        'date_field': 'published_parsed',
+        'image': ('media_content', 0, 'url'),
+        'image_url': MIRROR_IMAGE_URL,
+        'sort': 'desc',
+        'newest_first': True
+    },
+    'shotongoal': {
+        'url': SHOT_ON_GOAL_RSS_FEED,
+        'feed_link': 'link',
+        'feed_date': 'now',
+        'date_field': 'published_parsed',
+        'image_in_content': 'shotongoal.com',
+        'sort': 'desc',
+        'newest_first': True
+    },
+    'arsenal': {
+        'url': ARSENAL_RSS_FEED,
+        'feed_link': 'link',
+        'feed_date': 'now',
+        'date_field': 'published_parsed',
+        'image': ('media_thumbnail', 0, 'url'),
+        'sort': None
+    },
+    'liverpool': {
+        'url': LIVERPOOL_RSS_FEED,
+        'feed_link': 'link',
+        'feed_date': 'now',
+        'date_field': 'published_parsed',
+        'image': ('thumb',),
+        'sort': 'desc',
+        'newest_first': True
+    },
+    'chelsea': {
+        'url': CHELSEA_RSS_FEED,
+        'feed_link': 'link',
+        'feed_date': 'now',
+        'date_field': 'published_parsed',
+        'image': ('media_thumbnail', 0, 'url'),
+        'sort': None
+    },
+    'mancity': {
+        'url': MANCITY_RSS_FEED,
+        'feed_link': 'link',
+        'feed_date': 'now',
+        'date_field': 'published_parsed',
+        'image': ('media_thumbnail', 0, 'url'),
+        'sort': None
+    }
+}
+
+
+def _epoch(item, date_field):
+    # feedparser reads BST, CET and CEST as UTC, so its raw RFC 822 stamp is parsed again with their offsets;
+    # the streaming parser keeps no raw stamp and already applied them
+    date_str = item.get(date_field[:-len('_parsed')])
+    epoch = rfc822_to_epoch(date_str) if date_str else None
+    if epoch is None:
+        epoch = calendar.timegm(item[date_field])
+    return epoch
+
+
+def _required_fields(source):
+    # the fields get_feed reads for this source, as key paths into the feed and into each entry
+    feed_fields = [('title',), ('image', 'link') if source['feed_link'] == 'image' else ('link',)]
+    if source['feed_date'] == 'updated':
+        feed_fields.append(('updated_parsed',))
+    return feed_fields, [('title',), ('link',), (source['date_field'],)]
+
+
+class SoccersuckToken(object):
+
+    def __init__(self, ttl=SOCCER_SUCK_TOKEN_TTL, refresh_margin=60):
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        # register one device per process instead of one per request
+        self.unique_id = str(uuid.uuid4()).split('-')[0]
+        self.refreshes = 0
+        self._token = None
+        self._expires_at = 0
+        self._lock = threading.Lock()
+
+    def _request_token(self):
+        url = SOCCER_SUCK_API + '/accessToken'
+        payload = {
+            'secret_key': 'devtab',
+            'device_name': 'Xiaomi Mi Pad',
+            'device_version': '4.4.4',
+            'device_os': 'android',
+            'unique_id': self.unique_id
+        }
+        response = http_client.session.post(url, data=payload)
+        return response.json()['data']['access_token']
+
+    def get(self):
+        # callers arriving during a refresh wait for it instead of minting their own token
+        with self._lock:
+            if self._token is None or time() > self._expires_at - self.refresh_margin:
+                self._token = self._request_token()
+                self._expires_at = time() + self.ttl
+                self.refreshes += 1
+            return self._token
+
+    def invalidate(self, token):
+        with self._lock:
+            if self._token == token:
+                self._token = None
+
+
+soccersuck_token = SoccersuckToken()
 
-session = XMLSession()
 
 class RssFeed(object):
 
     def __init__(self):
         if hasattr(ssl, '_create_unverified_context'):
             ssl._create_default_https_context = ssl._create_unverified_context
+        # url: (etag, last_modified, body, content type, parsed feed, parsed limit) of the last download
+        self._feed_validators = {}
+        self._feed_lock = threading.Lock()
+        self.feed_polls = 0
+        self.feed_polls_not_modified = 0
 
-    def _convert_datetime_to_epoch(self, datetime_str, date_format):
-        if 'BST' in datetime_str:
-            os.environ['TZ'] = 'Europe/London'
-        datetime_obj = datetime.strptime(datetime_str, date_format)
-        return int(datetime_obj.timestamp())
+    def _convert_datetime_to_epoch(self, datetime_str, date_format, zone=None):
+        # explicit offsets only: process-wide TZ state is shared by every fetcher thread
+        if date_format == UK_DATE_FORMAT:
+            return convert_time_str_to_epoch(datetime_str)
+        return convert_local_str_to_epoch(datetime_str, date_format, zone)
+
+    def _parse_content(self, url, content, content_type, limit, source=None):
+        if STREAM_PARSE:
+            feed_fields, entry_fields = _required_fields(source) if source is not None else ((), ())
+            try:
+                return feed_stream.parse(content, limit, feed_fields, entry_fields), limit
+            except feed_stream.StreamParseError as e:
+                print('stream parse of {0} failed ({1}), using feedparser'.format(url, e))
+        # feedparser, BeautifulSoup and html2text are imported on first use to keep web process boot light
+        import feedparser
+        response_headers = {
+            'content-location': url,
+            'content-type': content_type
+        }
+        return feedparser.parse(content, response_headers=response_headers), None
+
+    def _parse_feed(self, url, limit=None, source=None):
+        request_headers = {}
+        with self._feed_lock:
+            validators = self._feed_validators.get(url)
+        if validators is not None:
+            etag, last_modified, content, content_type, parsed, parsed_limit = validators
+            if etag:
+                request_headers['If-None-Match'] = etag
+            if last_modified:
+                request_headers['If-Modified-Since'] = last_modified
+        response = http_client.session.get(url, headers=request_headers)
+        with self._feed_lock:
+            self.feed_polls += 1
+            if response.status_code == 304 and validators is not None:
+                self.feed_polls_not_modified += 1
+        if response.status_code == 304 and validators is not None:
+            # a parse that stopped early can only be reused for the same or a smaller limit
+            if parsed_limit is None or (limit is not None and limit <= parsed_limit):
+                return parsed
+        else:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            content = response.content
+            content_type = response.headers.get('Content-Type', '')
+        parsed, parsed_limit = self._parse_content(url, content, content_type, limit, source)
+        if response.status_code in (200, 304) and (etag or last_modified):
+            with self._feed_lock:
+                self._feed_validators[url] = (etag, last_modified, content, content_type, parsed, parsed_limit)
+        return parsed
+
+    def feed_stats(self):
+        with self._feed_lock:
+            return {
+                'polls': self.feed_polls,
+                'not_modified': self.feed_polls_not_modified,
+                'saved_ratio': float(self.feed_polls_not_modified) / self.feed_polls if self.feed_polls else 0.0
+            }
 
     def _format_image_url(self, image_url):
-        if str(image_url.startswith('http:')):
-            image_url = image_url.replace('http:', 'https:')
+        return https_url(image_url)
+
+    def _get_entry_image_url(self, source, entry):
+        if 'image_in_content' in source:
+            return self._get_image_url_from_content(entry['content'][0]['value'], source['image_in_content'])
+        image_url = source.get('image_url')
+        if 'image' in source:
+            try:
+                value = entry
+                for key in source['image']:
+                    value = value[key]
+                image_url = value
+            except (KeyError, IndexError):
+                if image_url is None:
+                    raise
+        if source.get('https_image'):
+            image_url = self._format_image_url(image_url)
         return image_url
 
-    def get_bbc_feed(self, limit):
-        d = feedparser.parse(BBC_RSS_FEED)
+    def get_feed(self, name, limit):
+        source = FEED_SOURCES[name]
+        if source['sort'] is None or source.get('newest_first'):
+            d = self._parse_feed(source['url'], limit, source)
+        else:
+            d = self._parse_feed(source['url'], source=source)
         data = dict()
         data['feed_title'] = d.feed.title
-        data['feed_link'] = d.feed.image.link
-        data['feed_date'] = mktime(d.feed.updated_parsed)
+        if source['feed_link'] == 'image' and 'link' in d.feed.get('image', {}):
+            data['feed_link'] = d.feed.image.link
+        else:
+            data['feed_link'] = d.feed.link
+        if source['feed_date'] == 'updated' and 'updated_parsed' in d.feed:
+            data['feed_date'] = _epoch(d.feed, 'updated_parsed')
+        else:
+            data['feed_date'] = int(time())
+        date_field = source['date_field']
+        if source['sort'] is None:
+            entries = d.entries[:limit]
+        elif source.get('newest_first'):
+            entries = sorted(d.entries[:limit], key=lambda e: _epoch(e, date_field),
+                             reverse=source['sort'] == 'desc')
+        else:
+            # heap selection of the newest entries, newest first
+            entries = heapq.nlargest(limit, d.entries, key=lambda e: _epoch(e, date_field))
+            if source['sort'] == 'asc':
+                entries.reverse()
         data['entries'] = []
-        for index in range(0, limit):
-            entry = d.entries[index]
+        for entry in entries:
             data['entries'].append(
                 {
                     'title': entry['title'],
                     'link': entry['link'],
-                    'publish_date': mktime(entry['published_parsed']),
-                    'image_url': self._format_image_url(entry['media_thumbnail'][0]['url'])
+                    'publish_date': _epoch(entry, date_field),
+                    'image_url': self._get_entry_image_url(source, entry)
                 }
             )
-        data['entries'] = sorted(data['entries'], key=lambda k: k['publish_date'], reverse=True)
         return data
 
+    def get_bbc_feed(self, limit):
+        return self.get_feed('bbc', limit)
+
     def get_skysports_feed(self, limit):
-        d = feedparser.parse(SKY_SPORTS_RSS_FEED)
-        data = dict()
-        data['feed_title'] = d.feed.title
-        data['feed_link'] = d.feed.image.link
-        data['feed_date'] = mktime(d.feed.updated_parsed)
-        data['entries'] = []
-        d.entries = sorted(d['entries'], key=lambda k: k['published_parsed'], reverse=True)
-        for index in range(0, limit):
-            entry = d.entries[index]
-            data['entries'].append(
-                {
-                    'title': entry['title'],
-                    'link': entry['link'],
-                    'publish_date': mktime(entry['published_parsed']),
-                    'image_url': self._format_image_url(entry['links'][1]['href'])
-                }
-            )
-        data['entries'] = sorted(data['entries'], key=lambda k: k['publish_date'], reverse=True)
-        return data
+        return self.get_feed('skysports', limit)
 
     def get_daily_mail_feed(self, limit):
-        d = feedparser.parse(DAILY_MAIL_RSS_FEED)
-        data = dict()
-        data['feed_title'] = d.feed.title
-        data['feed_link'] = d.feed.image.link
-        data['feed_date'] = mktime(d.feed.updated_parsed)
-        data['entries'] = []
-        d.entries = sorted(d['entries'], key=lambda k: k['published_parsed'], reverse=True)
-        for index in range(0, limit):
-            entry = d.entries[index]
-            data['entries'].append(
-                {
-                    'title': entry['title'],
-                    'link': entry['link'],
-                    'publish_date': mktime(entry['published_parsed']),
-                    'image_url': self._format_image_url(entry['links'][1]['href'])
-                }
-            )
-        data['entries'] = sorted(data['entries'], key=lambda k: k['publish_date'], reverse=True)
-        print('dailymail_data: {0}'.format(data))
-        return data
+        return self.get_feed('dailymail', limit)
 
     def get_goal_feed(self, limit):
-        d = feedparser.parse(GOAL_RSS_FEED)
-        data = dict()
-        data['feed_title'] = d.feed.title
-        data['feed_link'] = d.feed.link
-        data['feed_date'] = mktime(d.feed.updated_parsed)
-        data['entries'] = []
-        for index in range(0, limit):
-            entry = d.entries[index]
-            data['entries'].append(
-                {
-                    'title': entry['title'],
-                    'link': entry['link'],
-                    'publish_date': mktime(entry['updated_parsed']),
-                    'image_url': 'https://upload.wikimedia.org/wikipedia/commons/f/f1/Goal-com-logo-eps-vector-image.png'
-                }
-            )
-        data['entries'] = sorted(data['entries'], key=lambda k: k['publish_date'])
-        return data
+        return self.get_feed('goal', limit)
 
     def get_guardian_feed(self, limit):
-        d = feedparser.parse(GUARDIAN_RSS_FEED)
-        data = dict()
-        data['feed_title'] = d.feed.title
-        data['feed_link'] = d.feed.link
-        data['feed_date'] = mktime(d.feed.updated_parsed)
-        data['entries'] = []
-        for index in range(0, limit):
-            entry = d.entries[index]
-            data['entries'].append(
-                {
-                    'title': entry['title'],
-                    'link': entry['link'],
-                    'publish_date': mktime(entry['updated_parsed']),
-                    'image_url': entry['media_content'][1]['url']
-                }
-            )
-        data['entries'] = sorted(data['entries'], key=lambda k: k['publish_date'])
-        return data
+        return self.get_feed('guardian', limit)
 
     def get_mirror_feed(self, limit):
-        d = feedparser.parse(MIRROR_RSS_FEED)
-        data = dict()
-        data['feed_title'] = d.feed.title
-        data['feed_link'] = d.feed.link
-        data['feed_date'] = mktime(d.feed.updated_parsed)
-        data['entries'] = []
-        for index in range(0, limit):
-            entry = d.entries[index]
-            if 'media_content' not in entry:
-                image_url = 'https://logos-download.com/wp-content/uploads/2016/06/The_Daily_Mirror_logo_red_background.png'
-            else:
-                image_url = entry['media_content'][0]['url']
-            data['entries'].append(
-                {
-                    'title': entry['title'],
-                    'link': entry['link'],
-                    'publish_date': mktime(entry['published_parsed']),
-                    'image_url': image_url
-                }
-            )
-        data['entries'] = sorted(data['entries'], key=lambda k: k['publish_date'], reverse=True)
-        return data
+        return self.get_feed('mirror', limit)
+
+    def get_shot_on_goal_feed(self, limit):
+        return self.get_feed('shotongoal', limit)
+
+    def get_arsenal_feed(self, limit):
+        return self.get_feed('arsenal', limit)
+
+    def get_liverpool_feed(self, limit):
+        return self.get_feed('liverpool', limit)
+
+    def get_chelsea_feed(self, limit):
+        return self.get_feed('chelsea', limit)
+
+    def get_mancity_feed(self, limit):
+        return self.get_feed('mancity', limit)
 
     def _get_image_url_from_content(self, content, find_str):
+        from bs4 import BeautifulSoup
         bs = BeautifulSoup(content, 'html.parser')
         images = bs.find_all('img')
         for image in images:
             link = image.get('src')
             if find_str in link:
                 return link
-        return 'https://www.dwsports.com/on/demandware.static/-/' \
-               'Sites-DWS-Master-Catalog/default/dw88d7b256/products/0650288_01.jpeg'
+        return DEFAULT_NEWS_IMAGE_URL
 
-    def get_shot_on_goal_feed(self, limit):
-        d = feedparser.parse(SHOT_ON_GOAL_RSS_FEED)
-        data = dict()
-        data['feed_title'] = d.feed.title
-        data['feed_link'] = d.feed.link
-        data['feed_date'] = int(time())
-        data['entries'] = []
-        for index in range(0, limit):
-            entry = d.entries[index]
-            content = entry['content'][0]['value']
-            url = self._get_image_url_from_content(content, 'shotongoal.com')
-            data['entries'].append(
-                {
-                    'title': entry['title'],
-                    'link': entry['link'],
-                    'publish_date': mktime(entry['published_parsed']),
-                    'image_url': url
-                }
-            )
-        data['entries'] = sorted(data['entries'], key=lambda k: k['publish_date'], reverse=True)
-        return data
-
-    def _get_access_token(self):
-        url = SOCCER_SUCK_API + '/accessToken'
-        payload = {
-            'secret_key': 'devtab',
-            'device_name': 'Xiaomi Mi Pad',
-            'device_version': '4.4.4',
-            'device_os': 'android',
-            'unique_id': str(uuid.uuid4()).split('-')[0]
-        }
-        response = requests.post(url, data=payload)
-        return response.json()['data']['access_token']
+    def _post_soccersuck(self, path, payload, headers=None):
+        # retry once with a fresh token when the cached one has been revoked
+        for attempt in range(2):
+            access_token = soccersuck_token.get()
+            payload['access_token'] = access_token
+            response = http_client.session.post(SOCCER_SUCK_API + path, headers=headers, data=payload)
+            resp_json = response.json()
+            if response.status_code not in (401, 403) and resp_json.get('data') is not None:
+                return resp_json
+            soccersuck_token.invalidate(access_token)
+        return resp_json
 
     def _check_image_url(self, image_url):
         default_url = "https://is3-ssl.mzstatic.com/image/thumb/Purple118/v4/5a/06/" \
                    "49/5a06491d-2fe1-4805-8474-f3ebdc610266/source/512x512bb.jpg"
         try:
-            if str(image_url.startswith('http:')):
-                image_url = image_url.replace('http:', 'https:')
+            image_url = https_url(image_url)
             if '[' in image_url or ']' in image_url:
                 return default_url
-            if str(image_url.startswith('https:')):
+            if image_url.startswith('https:'):
                 return image_url
             else:
                 print("can not get image url: {0}".format(image_url))
@@ -242,15 +414,11 @@ class RssFeed(object):
             return default_url
 
     def get_soccersuck_feed(self, limit):
-        access_token = self._get_access_token()
-        url = SOCCER_SUCK_API + '/latestnews'
         payload = {
             'limit': limit,
-            'offset': '0',
-            'access_token': access_token
+            'offset': '0'
         }
-        response = requests.post(url, data=payload)
-        resp_json = response.json()
+        resp_json = self._post_soccersuck('/latestnews', payload)
         data = dict()
         data['feed_title'] = 'Soccersuck'
         data['feed_link'] = 'http://soccersuck.com'
@@ -263,132 +431,71 @@ class RssFeed(object):
                 {
                     'title': entry['title'],
                     'link': SOCCER_SUCK_TOPIC + '/' + entry["id"],
-                    'publish_date': self._convert_datetime_to_epoch(entry['date'], SOCCER_SUCK_DATE_FORMAT),
+                    'publish_date': self._convert_datetime_to_epoch(entry['date'], SOCCER_SUCK_DATE_FORMAT,
+                                                                    THAI_TIMEZONE.zone),
                     'image_url': url
                 }
             )
         data['entries'] = sorted(data['entries'], key=lambda k: k['publish_date'], reverse=True)
         return data
 
-    def get_manutd_feed(self, limit):
-        resp = session.get(MANUTD_RSS_FEED)
+    def _get_manutd_image_url(self, item):
+        images = [image.text.strip() for image in item.iter('image') if image.text and image.text.strip()]
+        if not images:
+            return DEFAULT_NEWS_IMAGE_URL
+        # items carry several renditions, the fourth is the one sized for news bubbles
+        return self._format_image_url(images[3] if len(images) > 3 else images[-1])
+
+    def parse_manutd_feed(self, content, limit):
         data = dict()
-        data['feed_title'] = resp.xml.xpath('//title', first=True).text
+        data['feed_title'] = None
         data['feed_link'] = 'https://www.manutd.com/en/news/latest'
         data['feed_date'] = int(time())
         data['entries'] = []
-        items = resp.xml.xpath('//item')
-        for item in items:
-            if len(data['entries']) > limit-1:
-                break
-            category = item.xpath('//category')[0].text
+        path = []
+        for event, elem in ElementTree.iterparse(BytesIO(content), events=('start', 'end')):
+            if event == 'start':
+                path.append(elem.tag)
+                continue
+            path.pop()
+            if elem.tag == 'title' and data['feed_title'] is None and path and path[-1] == 'channel':
+                data['feed_title'] = elem.text
+            if elem.tag != 'item':
+                continue
+            category = elem.findtext('category') or ''
             if category.lower() == 'news':
-                title = item.xpath('//title')[0].text
+                title = elem.findtext('title')
                 if not title:
-                    title = html2text.html2text(item.xpath('//newstext')[0].text)
+                    import html2text
+                    title = html2text.html2text(elem.findtext('newstext') or '').strip()
                 data['entries'].append(
                     {
                         'title': title,
-                        'link': item.xpath('//link')[0].text,
-                        'publish_date': self._convert_datetime_to_epoch(item.xpath('//pubDate')[0].text, UK_DATE_FORMAT),
-                        'image_url': self._format_image_url(item.xpath('//image')[3].text)
+                        'link': elem.findtext('link'),
+                        'publish_date': self._convert_datetime_to_epoch(elem.findtext('pubDate'), UK_DATE_FORMAT),
+                        'image_url': self._get_manutd_image_url(elem)
                     }
                 )
+            elem.clear()
+            if len(data['entries']) >= limit:
+                break
         return data
 
-    def get_arsenal_feed(self, limit):
-        d = feedparser.parse(ARSENAL_RSS_FEED)
-        data = dict()
-        data['feed_title'] = d.feed.title
-        data['feed_link'] = d.feed.link
-        data['feed_date'] = int(time())
-        data['entries'] = []
-        for index in range(0, limit):
-            entry = d.entries[index]
-            data['entries'].append(
-                {
-                    'title': entry['title'],
-                    'link': entry['link'],
-                    'publish_date': int(mktime(entry['published_parsed'])),
-                    'image_url': entry['media_thumbnail'][0]['url']
-                }
-            )
-        return data
-
-    def get_liverpool_feed(self, limit):
-        d = feedparser.parse(LIVERPOOL_RSS_FEED)
-        data = dict()
-        data['feed_title'] = d.feed.title
-        data['feed_link'] = d.feed.link
-        data['feed_date'] = time()
-        data['entries'] = []
-        for index in range(0, limit):
-            entry = d.entries[index]
-            data['entries'].append(
-                {
-                    'title': entry['title'],
-                    'link': entry['link'],
-                    'publish_date': mktime(entry['published_parsed']),
-                    'image_url': entry['thumb']
-                }
-            )
-        data['entries'] = sorted(data['entries'], key=lambda k: k['publish_date'], reverse=True)
-        return data
-
-    def get_chelsea_feed(self, limit):
-        d = feedparser.parse(CHELSEA_RSS_FEED)
-        data = dict()
-        data['feed_title'] = d.feed.title
-        data['feed_link'] = d.feed.link
-        data['feed_date'] = int(time())
-        data['entries'] = []
-        for index in range(0, limit):
-            entry = d.entries[index]
-            data['entries'].append(
-                {
-                    'title': entry['title'],
-                    'link': entry['link'],
-                    'publish_date': int(mktime(entry['published_parsed'])),
-                    'image_url': entry['media_thumbnail'][0]['url']
-                }
-            )
-        return data
+    def get_manutd_feed(self, limit):
+        response = http_client.session.get(MANUTD_RSS_FEED)
+        return self.parse_manutd_feed(response.content, limit)
 
-    def get_mancity_feed(self, limit):
-        d = feedparser.parse(MANCITY_RSS_FEED)
-        data = dict()
-        data['feed_title'] = d.feed.title
-        data['feed_link'] = d.feed.link
-        data['feed_date'] = int(time())
-        data['entries'] = []
-        for index in range(0, limit):
-            entry = d.entries[index]
-            data['entries'].append(
-                {
-                    'title': entry['title'],
-                    'link': entry['link'],
-                    'publish_date': int(mktime(entry['published_parsed'])),
-                    'image_url': entry['media_thumbnail'][0]['url']
-                }
-            )
-        return data
-    
     def get_live_feed(self):
-        access_token = self._get_access_token()
-        url = '{0}/fixtureschedule'.format(SOCCER_SUCK_API)
-        body = {
-            'access_token': access_token
-        }
         headers = {
             'Content-Type': 'application/x-www-form-urlencoded'
         }
-        response = requests.post(url, headers=headers, data=body)
-        return response.json()
+        return self._post_soccersuck('/fixtureschedule', {}, headers=headers)
     
     def create_live_flxed(self, data):
+        today = thai_today()
         for d in data:
             date = d['date']
-            if self.is_today_in_thai(date):
+            if self.is_today_in_thai(date, today):
                 carousel_container = {
                     "type": "carousel",
                     "contents": []
@@ -478,11 +585,10 @@ class RssFeed(object):
                     carousel_container['contents'].append(bubble)
                 return carousel_container
 
-    def is_today_in_thai(self, date_str):
-        date_obj = dateparser.parse(date_str, languages=['th'])
-        today = dateparser.parse('today 00:00')
-        today = today.replace(year=today.year + 543)
-        return date_obj == today
+    def is_today_in_thai(self, date_str, today=None):
+        if today is None:
+            today = thai_today()
+        return parse_thai_date(date_str) == today
 
 
 if __name__ == '__main__':
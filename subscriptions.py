@@ -0,0 +1,72 @@
+import threading
+
+USER = 'user'
+GROUP = 'group'
+ROOM = 'room'
+# LINE ids carry the chat type in their first letter
+CHAT_TYPES = {
+    'U': USER,
+    'C': GROUP,
+    'R': ROOM
+}
+
+LIVE_TV_TOPIC = 'live_tv'
+
+
+def chat_type(chat_id):
+    return CHAT_TYPES.get(chat_id[:1])
+
+
+def league_topic(league_name):
+    return 'scores:{0}'.format(league_name)
+
+
+class SubscriptionRegistry(object):
+
+    def __init__(self, store=None):
+        # store is a ChatStore shared by every worker; without one subscriptions live in this process
+        self.store = store
+        self._topics = dict()
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic, chat_id):
+        if self.store is not None:
+            return self.store.subscribe(topic, chat_id)
+        with self._lock:
+            chat_ids = self._topics.setdefault(topic, set())
+            added = chat_id not in chat_ids
+            chat_ids.add(chat_id)
+        return added
+
+    def unsubscribe(self, topic, chat_id):
+        if self.store is not None:
+            return self.store.unsubscribe(topic, chat_id)
+        with self._lock:
+            chat_ids = self._topics.get(topic, set())
+            removed = chat_id in chat_ids
+            chat_ids.discard(chat_id)
+        return removed
+
+    def subscribers(self, topic, chat_types=None):
+        if self.store is not None:
+            chat_ids = self.store.subscribers(topic)
+        else:
+            with self._lock:
+                chat_ids = sorted(self._topics.get(topic, ()))
+        if chat_types is not None:
+            chat_ids = [chat_id for chat_id in chat_ids if chat_type(chat_id) in chat_types]
+        return chat_ids
+
+    def stats(self):
+        if self.store is not None:
+            counts = self.store.subscription_counts()
+        else:
+            with self._lock:
+                counts = [(topic, chat_id[:1], 1) for topic, chat_ids in self._topics.items() for chat_id in chat_ids]
+        stats = dict()
+        for topic, prefix, count in counts:
+            topic_stats = stats.setdefault(topic, dict((kind, 0) for kind in CHAT_TYPES.values()))
+            kind = CHAT_TYPES.get(prefix)
+            if kind is not None:
+                topic_stats[kind] += count
+        return stats
@@ -0,0 +1,34 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from chat_store import ChatStore
+
+
+class LeaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        path = os.path.join(self.directory, 'chats.db')
+        # two workers sharing one database
+        self.first = ChatStore(database_url=None, path=path)
+        self.second = ChatStore(database_url=None, path=path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_one_holder_at_a_time(self):
+        self.assertTrue(self.first.acquire_lease('live_scores', 'worker-1', 60))
+        self.assertFalse(self.second.acquire_lease('live_scores', 'worker-2', 60))
+        # renewed by its holder
+        self.assertTrue(self.first.acquire_lease('live_scores', 'worker-1', 60))
+
+    def test_taken_over_once_expired(self):
+        self.assertTrue(self.first.acquire_lease('live_scores', 'worker-1', -1))
+        self.assertTrue(self.second.acquire_lease('live_scores', 'worker-2', 60))
+        self.assertFalse(self.first.acquire_lease('live_scores', 'worker-1', 60))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import calendar
+import unittest
+
+from convert_time import convert_epoch_to_str, convert_local_str_to_epoch, convert_time_str_to_epoch, rfc822_to_epoch
+
+# 2018-10-20 13:30:00 UTC
+EPOCH = calendar.timegm((2018, 10, 20, 13, 30, 0))
+
+
+class Rfc822ToEpochTest(unittest.TestCase):
+
+    def test_gmt(self):
+        self.assertEqual(rfc822_to_epoch('Sat, 20 Oct 2018 13:30:00 GMT'), EPOCH)
+        self.assertEqual(rfc822_to_epoch('Sat, 20 Oct 2018 13:30:00 UT'), EPOCH)
+
+    def test_bst(self):
+        self.assertEqual(rfc822_to_epoch('Sat, 20 Oct 2018 14:30:00 BST'), EPOCH)
+        self.assertEqual(rfc822_to_epoch('Sat, 20 Oct 2018 14:30:00 bst'), EPOCH)
+
+    def test_cet_and_cest(self):
+        self.assertEqual(rfc822_to_epoch('Sat, 20 Oct 2018 15:30:00 CEST'), EPOCH)
+        self.assertEqual(rfc822_to_epoch('Sat, 20 Oct 2018 14:30:00 CET'), EPOCH)
+
+    def test_numeric_offsets(self):
+        self.assertEqual(rfc822_to_epoch('Sat, 20 Oct 2018 14:30:00 +0100'), EPOCH)
+        self.assertEqual(rfc822_to_epoch('Sat, 20 Oct 2018 20:30:00 +0700'), EPOCH)
+        self.assertEqual(rfc822_to_epoch('Sat, 20 Oct 2018 09:30:00 -0400'), EPOCH)
+        self.assertEqual(rfc822_to_epoch('Sat, 20 Oct 2018 09:30:00 EDT'), EPOCH)
+
+    def test_day_boundary(self):
+        # 00:30 BST on the 21st is still the 20th in UTC
+        self.assertEqual(rfc822_to_epoch('Sun, 21 Oct 2018 00:30:00 BST'), EPOCH + 10 * 60 * 60)
+
+    def test_missing_zone_is_utc(self):
+        self.assertEqual(rfc822_to_epoch('Sat, 20 Oct 2018 13:30:00'), EPOCH)
+
+    def test_invalid(self):
+        self.assertIsNone(rfc822_to_epoch(''))
+        self.assertIsNone(rfc822_to_epoch(None))
+        self.assertIsNone(rfc822_to_epoch('yesterday'))
+        with self.assertRaises(ValueError):
+            convert_time_str_to_epoch('yesterday')
+
+
+class LocalTimeTest(unittest.TestCase):
+
+    def test_local_str_to_epoch(self):
+        self.assertEqual(convert_local_str_to_epoch('2018-10-20 20:30', '%Y-%m-%d %H:%M', 'Asia/Bangkok'), EPOCH)
+        self.assertEqual(convert_local_str_to_epoch('2018-10-20 14:30', '%Y-%m-%d %H:%M', 'Europe/London'), EPOCH)
+
+    def test_epoch_to_str(self):
+        self.assertEqual(convert_epoch_to_str(EPOCH, 'Asia/Bangkok'), '20 Oct 2018 20:30:00')
+        self.assertEqual(convert_epoch_to_str(EPOCH, 'Europe/London'), '20 Oct 2018 14:30:00')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+import calendar
+import os
+import unittest
+from unittest import mock
+
+import feedparser
+
+import feed_stream
+import http_client
+import rss_feed
+from rss_feed import FEED_SOURCES, RssFeed
+
+FEEDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'feeds')
+
+
+def read_feed(name, feeds_dir=FEEDS_DIR):
+    with open(os.path.join(feeds_dir, name + '.xml'), 'rb') as f:
+        return f.read()
+
+
+def lookup(entry, path):
+    value = entry
+    for key in path:
+        value = value[key]
+    return value
+
+
+class StreamParseTest(unittest.TestCase):
+    # the streaming parser must read every field a FEED_SOURCES rule uses the way feedparser does
+
+    def setUp(self):
+        self.rss_feed = RssFeed()
+
+    def _parse_both(self, name):
+        content = read_feed(name)
+        return feed_stream.parse(content), feedparser.parse(content)
+
+    def test_feed_fields(self):
+        for name, source in sorted(FEED_SOURCES.items()):
+            with self.subTest(source=name):
+                stream, expected = self._parse_both(name)
+                self.assertEqual(stream.feed.title, expected.feed.title)
+                if source['feed_link'] == 'image':
+                    self.assertEqual(stream.feed.image.link, expected.feed.image.link)
+                else:
+                    self.assertEqual(stream.feed.link, expected.feed.link)
+                if source['feed_date'] == 'updated':
+                    self.assertEqual(rss_feed._epoch(stream.feed, 'updated_parsed'),
+                                     rss_feed._epoch(expected.feed, 'updated_parsed'))
+
+    def test_entry_fields(self):
+        for name, source in sorted(FEED_SOURCES.items()):
+            with self.subTest(source=name):
+                stream, expected = self._parse_both(name)
+                self.assertEqual(len(stream.entries), len(expected.entries))
+                date_field = source['date_field']
+                for entry, expected_entry in zip(stream.entries, expected.entries):
+                    self.assertEqual(entry['title'], expected_entry['title'])
+                    self.assertEqual(entry['link'], expected_entry['link'])
+                    self.assertEqual(rss_feed._epoch(entry, date_field), rss_feed._epoch(expected_entry, date_field))
+                    self.assertEqual(self.rss_feed._get_entry_image_url(source, entry),
+                                     self.rss_feed._get_entry_image_url(source, expected_entry))
+
+    def test_image_paths(self):
+        for name, source in sorted(FEED_SOURCES.items()):
+            if 'image' not in source:
+                continue
+            with self.subTest(source=name):
+                stream, expected = self._parse_both(name)
+                found = 0
+                for entry, expected_entry in zip(stream.entries, expected.entries):
+                    try:
+                        value = lookup(expected_entry, source['image'])
+                    except (KeyError, IndexError):
+                        # the source's image_url stands in for a missing image
+                        self.assertIn('image_url', source)
+                        self.assertRaises((KeyError, IndexError), lookup, entry, source['image'])
+                        continue
+                    self.assertEqual(lookup(entry, source['image']), value)
+                    found += 1
+                self.assertGreater(found, 0)
+
+    def test_image_in_content(self):
+        for name, source in sorted(FEED_SOURCES.items()):
+            if 'image_in_content' not in source:
+                continue
+            with self.subTest(source=name):
+                stream, expected = self._parse_both(name)
+                for entry, expected_entry in zip(stream.entries, expected.entries):
+                    image_url = self.rss_feed._get_image_url_from_content(entry['content'][0]['value'],
+                                                                           source['image_in_content'])
+                    self.assertIn(source['image_in_content'], image_url)
+                    self.assertEqual(image_url, self.rss_feed._get_image_url_from_content(
+                        expected_entry['content'][0]['value'], source['image_in_content']))
+
+    def test_limit_keeps_the_first_entries(self):
+        for name in sorted(FEED_SOURCES):
+            with self.subTest(source=name):
+                content = read_feed(name)
+                entries = feed_stream.parse(content).entries
+                self.assertEqual(feed_stream.parse(content, 2).entries, entries[:2])
+
+
+class FixtureResponse(object):
+    status_code = 200
+    headers = {}
+
+    def __init__(self, content):
+        self.content = content
+
+
+class FixtureSession(object):
+
+    def __init__(self, feeds_dir=FEEDS_DIR):
+        self.feeds_dir = feeds_dir
+
+    def get(self, url, headers=None):
+        for name, source in FEED_SOURCES.items():
+            if source['url'] == url:
+                return FixtureResponse(read_feed(name, self.feeds_dir))
+        raise AssertionError('unexpected url {0}'.format(url))
+
+
+class FallbackPathTest(unittest.TestCase):
+    # RSS_STREAM_PARSE=off and a StreamParseError both serve the feed through feedparser
+
+    def _get_feed(self, name, stream_parse, feeds_dir=FEEDS_DIR):
+        with mock.patch.object(http_client, 'session', FixtureSession(feeds_dir)), \
+                mock.patch.object(rss_feed, 'STREAM_PARSE', stream_parse):
+            data = RssFeed().get_feed(name, 5)
+        if FEED_SOURCES[name]['feed_date'] == 'now':
+            del data['feed_date']
+        return data
+
+    def test_british_summer_time(self):
+        stream = self._get_feed('skysports', True)
+        fallback = self._get_feed('skysports', False)
+        # <lastBuildDate>Sat, 20 Oct 2018 14:02:00 BST</lastBuildDate>
+        self.assertEqual(stream['feed_date'], calendar.timegm((2018, 10, 20, 13, 2, 0)))
+        self.assertEqual(fallback['feed_date'], stream['feed_date'])
+        # <pubDate>Sat, 20 Oct 2018 14:25:00 BST</pubDate>
+        self.assertEqual(stream['entries'][0]['publish_date'], calendar.timegm((2018, 10, 20, 13, 25, 0)))
+        self.assertEqual([entry['publish_date'] for entry in fallback['entries']],
+                         [entry['publish_date'] for entry in stream['entries']])
+
+    def test_every_source_matches(self):
+        for name in sorted(FEED_SOURCES):
+            with self.subTest(source=name):
+                self.assertEqual(self._get_feed(name, False), self._get_feed(name, True))
+
+    def test_feed_without_image(self):
+        # skysports reads its feed link from <image><link>, which this copy of the feed lacks
+        feeds_dir = os.path.join(FEEDS_DIR, 'no_image')
+        feed_fields, entry_fields = rss_feed._required_fields(FEED_SOURCES['skysports'])
+        self.assertRaises(feed_stream.StreamParseError, feed_stream.parse,
+                          read_feed('skysports', feeds_dir), None, feed_fields, entry_fields)
+        stream = self._get_feed('skysports', True, feeds_dir)
+        self.assertEqual(stream, self._get_feed('skysports', False, feeds_dir))
+        self.assertEqual(stream['feed_link'], 'http://www.skysports.com')
+        self.assertEqual(len(stream['entries']), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from time import time
+from unittest import mock
+
+import football_api as football_api_module
+import http_client
+from chat_store import ChatStore
+from football_api import FootballApi
+from throttle import ThrottledError
+
+
+def _match(match_id, utc_date, home, away, status='SCHEDULED'):
+    return {
+        'id': match_id,
+        'utcDate': utc_date,
+        'status': status,
+        'homeTeam': {'id': home[0], 'name': home[1]},
+        'awayTeam': {'id': away[0], 'name': away[1]}
+    }
+
+
+MAN_UTD = (66, 'Manchester United FC')
+CHELSEA = (61, 'Chelsea FC')
+JUVENTUS = (109, 'Juventus FC')
+DERBY = (342, 'Derby County FC')
+
+
+class MatchesByTeamTest(unittest.TestCase):
+
+    def test_includes_cup_and_european_matches(self):
+        team_matches = {'matches': [
+            _match(1, '2018-10-20T11:30:00Z', CHELSEA, MAN_UTD, 'FINISHED'),
+            _match(2, '2018-10-23T19:00:00Z', MAN_UTD, JUVENTUS),
+            _match(3, '2018-10-28T16:00:00Z', MAN_UTD, (285, 'Everton FC')),
+            _match(4, '2018-10-30T19:45:00Z', MAN_UTD, DERBY)
+        ]}
+        football_api = FootballApi()
+        with mock.patch.object(football_api, '_get', return_value=team_matches) as get:
+            data = football_api.get_matches_by_team('66', 2, 'Europe/London')
+        get.assert_called_once_with('/teams/66/matches', 'matches')
+        self.assertEqual(data['team_name'], 'Manchester United FC')
+        self.assertEqual(data['matches'], [
+            {'dt': 'TUE, OCT 23 20:00', 'opponent_team_name': 'Juventus FC (H)', 'opponent_team_id': 109},
+            {'dt': 'SUN, OCT 28 16:00', 'opponent_team_name': 'Everton FC (H)', 'opponent_team_id': 285}
+        ])
+
+
+class FakeResponse(object):
+    status_code = 200
+    content = b'{"matches": []}'
+
+
+class FakeSession(object):
+
+    def __init__(self):
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, headers=None):
+        with self._lock:
+            self.requests.append(time())
+        return FakeResponse()
+
+
+class SharedRateLimitTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'chats.db')
+        self.session = FakeSession()
+        patches = [
+            mock.patch.object(http_client, 'session', self.session),
+            mock.patch.object(football_api_module, 'rate_queue_timeout', 0)
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _call_many(self, apis, count):
+        throttled = []
+
+        def call(api, index):
+            try:
+                api._get('/teams/{0}/matches'.format(index), 'matches')
+            except ThrottledError:
+                throttled.append(index)
+
+        threads = [threading.Thread(target=call, args=(apis[i % len(apis)], i)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return throttled
+
+    def test_workers_share_one_budget(self):
+        # two workers, each with its own FootballApi, on one database
+        apis = [FootballApi(store=ChatStore(database_url=None, path=self.path)) for _ in range(2)]
+        started = time()
+        throttled = self._call_many(apis, 30)
+        rate_per_minute = football_api_module.rate_per_minute
+        allowed = int(rate_per_minute + (time() - started) * rate_per_minute / 60)
+        self.assertLessEqual(len(self.session.requests), allowed)
+        self.assertEqual(len(self.session.requests) + len(throttled), 30)
+        self.assertEqual(sum(api.rate_limiter.throttled for api in apis), len(throttled))
+
+    def test_separate_buckets_would_double_the_rate(self):
+        apis = [FootballApi() for _ in range(2)]
+        self._call_many(apis, 30)
+        self.assertEqual(len(self.session.requests), 2 * int(football_api_module.rate_per_minute))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+from datetime import datetime
+from time import sleep
+
+from live_scores import GOAL, LiveScoreEngine
+from match_store import MatchStore
+
+
+def _match(match_id, utc_date, status='SCHEDULED', home=None, away=None):
+    return {
+        'id': match_id,
+        'utcDate': utc_date,
+        'status': status,
+        'matchday': 1,
+        'homeTeam': {'id': 1, 'name': 'Home'},
+        'awayTeam': {'id': 2, 'name': 'Away'},
+        'score': {'fullTime': {'homeTeam': home, 'awayTeam': away}}
+    }
+
+
+class FakeFootballApi(object):
+
+    def __init__(self, matches):
+        self.requests = []
+        self.live = []
+        self.season_response = {'competition': {'name': 'Premier League'}, 'matches': matches}
+        self.match_store = MatchStore(self._fetch)
+
+    def _fetch(self, path, endpoint, params):
+        self.requests.append((path, params))
+        return self.season_response
+
+    def get_live_matches(self, competition_id):
+        self.requests.append(('live', competition_id))
+        return self.live
+
+    def get_match(self, match_id):
+        self.requests.append(('match', match_id))
+        return _match(match_id, '2018-10-20T14:00:00Z', 'FINISHED', 1, 0)
+
+
+class LiveScoreEngineTest(unittest.TestCase):
+
+    def setUp(self):
+        now = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+        self.api = FakeFootballApi([_match(1, now)])
+        self.engine = LiveScoreEngine(self.api, ['2021'], lambda *args: None, poll_interval=60,
+                                      idle_interval=300, rate_per_minute=5)
+
+    def test_schedule_is_loaded_once_and_not_refreshed(self):
+        self.assertEqual(self.engine.active_competitions(), {'2021'})
+        self.assertEqual(self.engine.active_competitions(), {'2021'})
+        self.assertEqual(len(self.api.requests), 1)
+        self.assertEqual(self.engine.calls, 1)
+
+    def test_every_request_counts_against_the_rate(self):
+        self.engine.active_competitions()
+        self.api.live = [_match(1, '2018-10-20T14:00:00Z', 'IN_PLAY', 0, 0)]
+        self.engine.poll('2021')
+        self.api.live = []
+        self.engine.poll('2021')
+        self.assertEqual(self.engine.calls, len(self.api.requests))
+        self.assertEqual(self.engine.calls, 4)
+        # four requests at five a minute fit in the poll interval, ten do not
+        self.assertEqual(self.engine.next_interval({'2021'}, self.engine.calls), 60)
+        self.assertEqual(self.engine.next_interval({'2021'}, 10), 120.0)
+        self.assertEqual(self.engine.next_interval(set(), 1), 300)
+
+    def test_goal_after_baseline(self):
+        self.api.live = [_match(1, '2018-10-20T14:00:00Z', 'IN_PLAY', 0, 0)]
+        self.assertEqual(self.engine.poll('2021'), [])
+        self.api.live = [_match(1, '2018-10-20T14:00:00Z', 'IN_PLAY', 1, 0)]
+        self.assertEqual([event[0] for event in self.engine.poll('2021')], [GOAL])
+
+    def test_follower_does_not_poll(self):
+        engine = LiveScoreEngine(self.api, ['2021'], lambda *args: None, poll_interval=0.01, elect=lambda ttl: False)
+        engine.start()
+        sleep(0.05)
+        engine.stop()
+        self.assertEqual(self.api.requests, [])
+        self.assertFalse(engine.stats()['leader'])
+
+
+if __name__ == '__main__':
+    unittest.main()
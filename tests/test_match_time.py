@@ -0,0 +1,48 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pytz
+
+from chat_store import ChatStore
+from match_time import ChatTimeZones
+
+
+class ChatTimeZonesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'chats.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _zones(self, refresh=60):
+        return ChatTimeZones('Asia/Bangkok', store=ChatStore(database_url=None, path=self.path), refresh=refresh)
+
+    def test_default_zone(self):
+        zones = self._zones()
+        self.assertEqual(zones.get(None), 'Asia/Bangkok')
+        self.assertEqual(zones.get('U1'), 'Asia/Bangkok')
+
+    def test_set_is_seen_by_other_workers(self):
+        zones = self._zones()
+        self.assertEqual(zones.set('C1', 'Europe/London'), 'Europe/London')
+        self.assertEqual(zones.set('C1', 'Europe/Paris'), 'Europe/Paris')
+        self.assertEqual(zones.get('C1'), 'Europe/Paris')
+        self.assertEqual(self._zones().get('C1'), 'Europe/Paris')
+
+    def test_reads_the_store_again_after_refresh(self):
+        zones = self._zones(refresh=-1)
+        self.assertEqual(zones.get('U1'), 'Asia/Bangkok')
+        self._zones().set('U1', 'Asia/Tokyo')
+        self.assertEqual(zones.get('U1'), 'Asia/Tokyo')
+
+    def test_unknown_zone(self):
+        with self.assertRaises(pytz.UnknownTimeZoneError):
+            self._zones().set('U1', 'Mars/Olympus')
+
+
+if __name__ == '__main__':
+    unittest.main()
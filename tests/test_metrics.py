@@ -0,0 +1,60 @@
+import unittest
+
+import metrics
+
+
+class ExposeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = metrics.Registry()
+
+    def _lines(self):
+        return self.registry.expose().splitlines()
+
+    def test_stats_counters_and_gauges(self):
+        stats = {
+            'hits': 12,
+            'misses': 3,
+            'hit_ratio': 0.8,
+            'entries': 40,
+            'bytes': 2048,
+            'match_store': {'loads': 5, 'matches': 1571}
+        }
+        self.registry.add_stats('football_api', 'Response cache.', lambda: stats,
+                                counters=('hits', 'misses', 'match_store_loads'))
+        lines = self._lines()
+        for name in ('football_api_hits_total', 'football_api_misses_total', 'football_api_match_store_loads_total'):
+            self.assertIn('# TYPE {0} counter'.format(name), lines)
+        self.assertIn('football_api_hits_total 12.0', lines)
+        self.assertIn('football_api_match_store_loads_total 5.0', lines)
+        for name in ('football_api_hit_ratio', 'football_api_entries', 'football_api_bytes',
+                     'football_api_match_store_matches'):
+            self.assertIn('# TYPE {0} gauge'.format(name), lines)
+        self.assertIn('football_api_bytes 2048.0', lines)
+        self.assertNotIn('football_api_hits 12.0', lines)
+
+    def test_failing_stats_are_skipped(self):
+        def broken():
+            raise RuntimeError('gone')
+
+        self.registry.add_stats('broken', 'Broken.', broken, counters=('hits',))
+        self.registry.add_stats('queue', 'Queue.', lambda: {'depth': 2})
+        self.assertEqual(self._lines(), ['# HELP queue_depth Queue.', '# TYPE queue_depth gauge', 'queue_depth 2.0'])
+
+    def test_counter_and_histogram(self):
+        errors = self.registry.counter('handler_errors_total', 'Errors.', ('handler',))
+        seconds = self.registry.histogram('handler_seconds', 'Latency.', ('handler',), buckets=(0.1, 1.0))
+        errors.inc('handle_fixtures')
+        seconds.observe(0.05, 'handle_fixtures')
+        seconds.observe(0.5, 'handle_fixtures')
+        lines = self._lines()
+        self.assertIn('# TYPE handler_errors_total counter', lines)
+        self.assertIn('handler_errors_total{handler="handle_fixtures"} 1', lines)
+        self.assertIn('handler_seconds_bucket{handler="handle_fixtures",le="0.1"} 1', lines)
+        self.assertIn('handler_seconds_bucket{handler="handle_fixtures",le="1.0"} 2', lines)
+        self.assertIn('handler_seconds_bucket{handler="handle_fixtures",le="+Inf"} 2', lines)
+        self.assertIn('handler_seconds_count{handler="handle_fixtures"} 2', lines)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import os
+import unittest
+import xml.etree.ElementTree as ElementTree
+from unittest import mock
+
+import rss_feed
+from rss_feed import DEFAULT_NEWS_IMAGE_URL, RssFeed
+
+FEEDS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'feeds')
+
+
+def read_feed(name):
+    with open(os.path.join(FEEDS_DIR, name + '.xml'), 'rb') as f:
+        return f.read()
+
+
+class ManutdFeedTest(unittest.TestCase):
+
+    def setUp(self):
+        self.content = read_feed('manutd')
+        self.rss_feed = RssFeed()
+
+    def test_feed_details(self):
+        data = self.rss_feed.parse_manutd_feed(self.content, 5)
+        # the channel title, not the title of its image or of an item
+        self.assertEqual(data['feed_title'], 'Manchester United News')
+        self.assertEqual(data['feed_link'], 'https://www.manutd.com/en/news/latest')
+
+    def test_news_items(self):
+        entries = self.rss_feed.parse_manutd_feed(self.content, 10)['entries']
+        self.assertEqual(entries[0], {
+            'title': 'Mourinho previews Chelsea trip',
+            'link': 'https://www.manutd.com/en/news/detail/mourinho-previews-chelsea-trip',
+            # 14:30 BST
+            'publish_date': 1539955800,
+            # the fourth rendition, served over https
+            'image_url': 'https://www.manutd.com/images/mourinho/large.jpg'
+        })
+        self.assertEqual(entries[3], {
+            'title': 'Ticket news: Juventus away',
+            'link': 'https://www.manutd.com/en/news/detail/ticket-news-juventus-away',
+            'publish_date': 1539853200,
+            'image_url': 'https://www.manutd.com/images/tickets/large.jpg'
+        })
+
+    def test_skips_other_categories(self):
+        entries = self.rss_feed.parse_manutd_feed(self.content, 10)['entries']
+        self.assertEqual([entry['link'].rsplit('/', 1)[1] for entry in entries], [
+            'mourinho-previews-chelsea-trip',
+            'pogba-fitness-update',
+            'academy-report-under-23s-beat-derby',
+            'ticket-news-juventus-away'
+        ])
+
+    def test_title_from_newstext(self):
+        entry = self.rss_feed.parse_manutd_feed(self.content, 10)['entries'][1]
+        self.assertEqual(entry['title'], '**Pogba** is fit to face Chelsea')
+
+    def test_image_fallbacks(self):
+        entries = self.rss_feed.parse_manutd_feed(self.content, 10)['entries']
+        # fewer than four renditions uses the last one, none uses the default image
+        self.assertEqual(entries[1]['image_url'], 'https://www.manutd.com/images/pogba/small.jpg')
+        self.assertEqual(entries[2]['image_url'], DEFAULT_NEWS_IMAGE_URL)
+
+    def test_stops_at_limit(self):
+        items = []
+        iterparse = ElementTree.iterparse
+
+        def counting_iterparse(*args, **kwargs):
+            for event, elem in iterparse(*args, **kwargs):
+                if event == 'end' and elem.tag == 'item':
+                    items.append(elem.findtext('link'))
+                yield event, elem
+
+        with mock.patch.object(rss_feed.ElementTree, 'iterparse', counting_iterparse):
+            entries = self.rss_feed.parse_manutd_feed(self.content, 2)['entries']
+        self.assertEqual(len(entries), 2)
+        # the video item before the second news item is read, nothing after it
+        self.assertEqual(len(items), 3)
+        self.assertEqual(items[-1], entries[-1]['link'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from chat_store import ChatStore
+from subscriptions import LIVE_TV_TOPIC, SubscriptionRegistry, league_topic
+
+
+class SubscriptionRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'chats.db')
+        self.registry = SubscriptionRegistry(store=ChatStore(database_url=None, path=self.path))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_subscribe_and_unsubscribe(self):
+        self.assertTrue(self.registry.subscribe(LIVE_TV_TOPIC, 'U1'))
+        self.assertFalse(self.registry.subscribe(LIVE_TV_TOPIC, 'U1'))
+        self.registry.subscribe(league_topic('pl'), 'C1')
+        self.assertEqual(self.registry.subscribers(LIVE_TV_TOPIC), ['U1'])
+        self.assertTrue(self.registry.unsubscribe(LIVE_TV_TOPIC, 'U1'))
+        self.assertFalse(self.registry.unsubscribe(LIVE_TV_TOPIC, 'U1'))
+        self.assertEqual(self.registry.subscribers(LIVE_TV_TOPIC), [])
+        self.assertEqual(self.registry.subscribers(league_topic('pl')), ['C1'])
+
+    def test_concurrent_subscribes_are_not_lost(self):
+        threads = [threading.Thread(target=self.registry.subscribe, args=(LIVE_TV_TOPIC, 'U{0}'.format(i)))
+                   for i in range(40)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(self.registry.subscribers(LIVE_TV_TOPIC)), 40)
+
+    def test_shared_between_registries(self):
+        # another worker opens the same database
+        other = SubscriptionRegistry(store=ChatStore(database_url=None, path=self.path))
+        other.subscribe(LIVE_TV_TOPIC, 'R1')
+        self.assertEqual(self.registry.subscribers(LIVE_TV_TOPIC), ['R1'])
+
+    def test_filters_and_counts_chat_types(self):
+        for chat_id in ('U1', 'U2', 'C1', 'R1'):
+            self.registry.subscribe(LIVE_TV_TOPIC, chat_id)
+        self.assertEqual(self.registry.subscribers(LIVE_TV_TOPIC, chat_types=('group', 'room')), ['C1', 'R1'])
+        self.assertEqual(self.registry.stats(), {LIVE_TV_TOPIC: {'user': 2, 'group': 1, 'room': 1}})
+
+
+if __name__ == '__main__':
+    unittest.main()
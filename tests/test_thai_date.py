@@ -0,0 +1,33 @@
+import unittest
+from datetime import date
+
+from thai_date import parse_thai_date
+
+
+class ParseThaiDateTest(unittest.TestCase):
+
+    def test_schedule_date(self):
+        self.assertEqual(parse_thai_date('วันเสาร์ที่ 20 ตุลาคม 2561'), date(2018, 10, 20))
+
+    def test_year_boundary(self):
+        self.assertEqual(parse_thai_date('วันจันทร์ที่ 31 ธันวาคม 2561'), date(2018, 12, 31))
+        self.assertEqual(parse_thai_date('วันอังคารที่ 1 มกราคม 2562'), date(2019, 1, 1))
+
+    def test_leap_day(self):
+        self.assertEqual(parse_thai_date('วันเสาร์ที่ 29 กุมภาพันธ์ 2563'), date(2020, 2, 29))
+        # 2562 is 2019, not a leap year
+        self.assertIsNone(parse_thai_date('วันศุกร์ที่ 29 กุมภาพันธ์ 2562'))
+
+    def test_abbreviated_month_and_thai_digits(self):
+        self.assertEqual(parse_thai_date('๒ มี.ค. ๒๕๖๒'), date(2019, 3, 2))
+
+    def test_christian_year(self):
+        self.assertEqual(parse_thai_date('20 ตุลาคม 2018'), date(2018, 10, 20))
+
+    def test_not_a_date(self):
+        self.assertIsNone(parse_thai_date('โปรแกรมถ่ายทอดสด'))
+        self.assertIsNone(parse_thai_date('20 October 2561'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+import threading
+import unittest
+from time import sleep, time
+
+from throttle import SharedTokenBucket, SingleFlight, TokenBucket
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def _run_concurrently(self, single_flight, func, callers):
+        results = []
+        errors = []
+
+        def call():
+            try:
+                results.append(single_flight.do('/competitions/2021/standings', func))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(callers)]
+        for thread in threads:
+            thread.start()
+        return threads, results, errors
+
+    def _wait_for_followers(self, single_flight, followers):
+        deadline = time() + 5
+        while single_flight.coalesced < followers and time() < deadline:
+            sleep(0.001)
+        self.assertEqual(single_flight.coalesced, followers)
+
+    def test_concurrent_callers_share_one_fetch(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+        fetches = []
+
+        def fetch():
+            fetches.append(1)
+            release.wait(5)
+            return {'standings': []}
+
+        threads, results, errors = self._run_concurrently(single_flight, fetch, 8)
+        self._wait_for_followers(single_flight, 7)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(fetches), 1)
+        self.assertEqual(errors, [])
+        self.assertEqual(results, [{'standings': []}] * 8)
+        self.assertIs(results[0], results[-1])
+
+    def test_error_reaches_every_waiter(self):
+        single_flight = SingleFlight()
+        release = threading.Event()
+        error = RuntimeError('429 Too Many Requests')
+
+        def fetch():
+            release.wait(5)
+            raise error
+
+        threads, results, errors = self._run_concurrently(single_flight, fetch, 5)
+        self._wait_for_followers(single_flight, 4)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [])
+        self.assertEqual(errors, [error] * 5)
+
+    def test_next_call_fetches_again(self):
+        single_flight = SingleFlight()
+        fetches = []
+        single_flight.do('key', lambda: fetches.append(1))
+        single_flight.do('key', lambda: fetches.append(1))
+        self.assertEqual(len(fetches), 2)
+        self.assertEqual(single_flight.coalesced, 0)
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def test_burst_up_to_capacity(self):
+        bucket = TokenBucket(rate=0.1, capacity=3)
+        self.assertEqual([bucket.acquire() for _ in range(4)], [True, True, True, False])
+        self.assertEqual(bucket.queued, 0)
+        self.assertEqual(bucket.throttled, 1)
+
+    def test_waits_for_a_token_within_the_timeout(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        self.assertTrue(bucket.acquire())
+        started = time()
+        self.assertTrue(bucket.acquire(timeout=1))
+        self.assertGreater(time() - started, 0.01)
+        self.assertEqual(bucket.queued, 1)
+        self.assertEqual(bucket.throttled, 0)
+
+    def test_throttles_when_the_wait_exceeds_the_timeout(self):
+        bucket = TokenBucket(rate=0.5, capacity=1)
+        self.assertTrue(bucket.acquire())
+        started = time()
+        self.assertFalse(bucket.acquire(timeout=0.1))
+        # gives up at once instead of sleeping until the deadline
+        self.assertLess(time() - started, 0.1)
+        self.assertEqual(bucket.queued, 0)
+        self.assertEqual(bucket.throttled, 1)
+
+    def test_concurrent_callers_get_one_token_each(self):
+        bucket = TokenBucket(rate=0.1, capacity=5)
+        acquired = []
+        threads = [threading.Thread(target=lambda: acquired.append(bucket.acquire())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(acquired), [False] * 3 + [True] * 5)
+        self.assertEqual(bucket.throttled, 3)
+
+
+class BrokenStore(object):
+
+    def take_token(self, name, rate, capacity):
+        raise IOError('database unavailable')
+
+
+class SharedTokenBucketTest(unittest.TestCase):
+
+    def test_falls_back_to_the_local_share(self):
+        fallback = TokenBucket(rate=0.1, capacity=1)
+        bucket = SharedTokenBucket(BrokenStore(), 'football_data', rate=1, capacity=10, fallback=fallback)
+        self.assertEqual([bucket.acquire(), bucket.acquire()], [True, False])
+        self.assertEqual(fallback.throttled, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+import pytz
+
+BUDDHIST_ERA_OFFSET = 543
+THAI_TIMEZONE = pytz.timezone('Asia/Bangkok')
+
+THAI_MONTHS = {
+    'มกราคม': 1, 'ม.ค.': 1,
+    'กุมภาพันธ์': 2, 'ก.พ.': 2,
+    'มีนาคม': 3, 'มี.ค.': 3,
+    'เมษายน': 4, 'เม.ย.': 4,
+    'พฤษภาคม': 5, 'พ.ค.': 5,
+    'มิถุนายน': 6, 'มิ.ย.': 6,
+    'กรกฎาคม': 7, 'ก.ค.': 7,
+    'สิงหาคม': 8, 'ส.ค.': 8,
+    'กันยายน': 9, 'ก.ย.': 9,
+    'ตุลาคม': 10, 'ต.ค.': 10,
+    'พฤศจิกายน': 11, 'พ.ย.': 11,
+    'ธันวาคม': 12, 'ธ.ค.': 12
+}
+THAI_DIGITS = str.maketrans('๐๑๒๓๔๕๖๗๘๙', '0123456789')
+
+# "วันเสาร์ที่ 2 มีนาคม 2562": optional weekday, day, month name, Buddhist (or Christian) year
+DATE_PATTERN = re.compile(r'(\d{1,2})\s*([^\s\d]+)\s*(\d{4})')
+
+
+@lru_cache(maxsize=256)
+def parse_thai_date(date_str):
+    match = DATE_PATTERN.search(date_str.translate(THAI_DIGITS))
+    if match is None:
+        return None
+    day, month_name, year = match.groups()
+    month = THAI_MONTHS.get(month_name)
+    if month is None:
+        return None
+    year = int(year)
+    # the schedule writes Buddhist Era years, which start on 1 January like the Christian calendar
+    if year > 2400:
+        year -= BUDDHIST_ERA_OFFSET
+    try:
+        return date(year, month, int(day))
+    except ValueError:
+        return None
+
+
+def thai_today():
+    return datetime.now(THAI_TIMEZONE).date()
@@ -0,0 +1,118 @@
+import threading
+from time import sleep, time
+
+
+class ThrottledError(Exception):
+    pass
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class TokenBucket(object):
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.queued = 0
+        self.throttled = 0
+        self._tokens = float(capacity)
+        self._updated_at = time()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def acquire(self, timeout=0):
+        deadline = time() + timeout
+        waited = False
+        while True:
+            with self._lock:
+                now = time()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    if waited:
+                        self.queued += 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+                if now + wait > deadline:
+                    self.throttled += 1
+                    return False
+            waited = True
+            sleep(wait)
+
+
+class SharedTokenBucket(object):
+    # a TokenBucket kept in a ChatStore row, so every worker draws from the one budget
+
+    def __init__(self, store, name, rate, capacity, fallback=None):
+        self.store = store
+        self.name = name
+        self.rate = rate
+        self.capacity = capacity
+        # used while the store cannot be reached
+        self.fallback = fallback if fallback is not None else TokenBucket(rate, capacity)
+        self.queued = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout=0):
+        deadline = time() + timeout
+        waited = False
+        while True:
+            try:
+                wait = self.store.take_token(self.name, self.rate, self.capacity)
+            except Exception as e:
+                print('shared rate limit {0} unavailable: {1!r}'.format(self.name, e))
+                return self.fallback.acquire(max(0, deadline - time()))
+            if wait == 0:
+                if waited:
+                    with self._lock:
+                        self.queued += 1
+                return True
+            if time() + wait > deadline:
+                with self._lock:
+                    self.throttled += 1
+                return False
+            waited = True
+            sleep(wait)
@@ -0,0 +1,72 @@
+import queue
+import threading
+from time import time
+
+
+class WebhookQueue(object):
+
+    def __init__(self, handle, workers=4, max_size=100, put_timeout=1.0):
+        self.handle = handle
+        self.workers = workers
+        self.put_timeout = put_timeout
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name='webhook-worker-{0}'.format(index))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, job):
+        # a full queue blocks the webhook request for up to put_timeout before shedding it
+        try:
+            self._queue.put((job, time()), timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def _work(self):
+        while True:
+            job, enqueued_at = self._queue.get()
+            wait = time() - enqueued_at
+            with self._lock:
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            try:
+                self.handle(job)
+                with self._lock:
+                    self.processed += 1
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                print('webhook worker failed: {0!r}'.format(e))
+            finally:
+                self._queue.task_done()
+
+    def stats(self):
+        with self._lock:
+            started = self.processed + self.failed
+            return {
+                'depth': self._queue.qsize(),
+                'max_size': self._queue.maxsize,
+                'workers': self.workers,
+                'enqueued': self.enqueued,
+                'processed': self.processed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'avg_wait': self.total_wait / started if started else 0.0,
+                'max_wait': self.max_wait
+            }